@@ -0,0 +1,162 @@
+from hashlib import md5
+from time import time_ns
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+from rest_framework.response import Response
+
+CACHE_PREFIX = 'api'
+CACHE_METRICS = ('hit', 'miss', 'bypass')
+POPULARITY_NAMESPACE = 'popularity'
+
+
+def generation_key(namespace):
+    return f'{CACHE_PREFIX}:generation:{namespace}'
+
+
+def metric_key(namespace, metric):
+    return f'{CACHE_PREFIX}:metrics:{namespace}:{metric}'
+
+
+def get_generations(namespaces):
+    keys = [generation_key(namespace) for namespace in namespaces]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, time_ns(), None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def user_state_namespace(user_id):
+    return f'user-state:{user_id}'
+
+
+def bump_generation(namespace):
+    key = generation_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time_ns(), None)
+
+
+def count_metric(namespace, metric):
+    key = metric_key(namespace, metric)
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def get_cache_metrics(namespaces):
+    keys = {
+        metric_key(namespace, metric): (namespace, metric)
+        for namespace in namespaces
+        for metric in CACHE_METRICS
+    }
+    values = cache.get_many(keys)
+    metrics = {
+        namespace: dict.fromkeys(CACHE_METRICS, 0)
+        for namespace in namespaces
+    }
+    for key, (namespace, metric) in keys.items():
+        metrics[namespace][metric] = values.get(key, 0)
+    return metrics
+
+
+class CachedResponseMixin:
+    cache_namespace = None
+    cache_dependencies = ()
+    cache_anonymous_only = False
+
+    def get_cache_dependencies(self):
+        return self.cache_dependencies
+
+    def get_response_cache_key(self, request):
+        generations = get_generations(
+            (self.cache_namespace, *self.get_cache_dependencies())
+        )
+        query = sorted(
+            (key, sorted(values))
+            for key, values in request.query_params.lists()
+        )
+        raw = (
+            f'{request.scheme}://{request.get_host()}{request.path}'
+            f'|{query}|{generations}'
+        )
+        digest = md5(raw.encode('utf-8')).hexdigest()
+        return f'{CACHE_PREFIX}:response:{self.cache_namespace}:{digest}'
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        if not settings.API_CACHE_ENABLED:
+            return handler(request, *args, **kwargs)
+        if self.cache_anonymous_only and request.user.is_authenticated:
+            count_metric(self.cache_namespace, 'bypass')
+            response = handler(request, *args, **kwargs)
+            response['X-Cache'] = 'BYPASS'
+            return response
+        key = self.get_response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            count_metric(self.cache_namespace, 'hit')
+            return Response(data, headers={'X-Cache': 'HIT'})
+        count_metric(self.cache_namespace, 'miss')
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class ConditionalResponseMixin:
+    conditional_dependencies = ()
+
+    def get_conditional_dependencies(self):
+        return self.conditional_dependencies
+
+    def get_etag(self, request):
+        namespaces = list(self.get_conditional_dependencies())
+        if request.user.is_authenticated:
+            namespaces.append(user_state_namespace(request.user.pk))
+        state = (
+            request.build_absolute_uri(),
+            request.user.pk,
+            get_generations(namespaces),
+        )
+        return quote_etag(md5(repr(state).encode('utf-8')).hexdigest())
+
+    def get_conditional_response(self, handler, request, *args, **kwargs):
+        if not settings.API_CACHE_ENABLED:
+            return handler(request, *args, **kwargs)
+        etag = self.get_etag(request)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        patch_vary_headers(response, ('Authorization', 'Cookie'))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
@@ -0,0 +1,127 @@
+import csv
+import json
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from fontTools.ttLib import TTLibError
+from fpdf import FPDF
+from rest_framework.exceptions import APIException
+
+SHOPPING_LIST_TITLE = 'Список покупок'
+SHOPPING_LIST_FILENAME = 'shop_list'
+AMOUNT_PRECISION = 2
+
+
+class PdfFontUnavailable(APIException):
+    status_code = 503
+    default_detail = 'Не удалось загрузить шрифт для списка покупок в PDF'
+    default_code = 'pdf_font_unavailable'
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+class ShoppingListExporter:
+    format = None
+    content_type = None
+
+    def __init__(self, ingredients):
+        self.ingredients = ingredients
+
+    def rows(self):
+        for item in self.ingredients.iterator():
+            amount = float(round(item['amount'], AMOUNT_PRECISION))
+            yield (
+                item['name'],
+                int(amount) if amount.is_integer() else amount,
+                item['measurement_unit'],
+            )
+
+    def render(self):
+        raise NotImplementedError
+
+    def get_response(self):
+        response = StreamingHttpResponse(
+            self.render(), content_type=self.content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{SHOPPING_LIST_FILENAME}.{self.format}"'
+        )
+        return response
+
+
+class TxtExporter(ShoppingListExporter):
+    format = 'txt'
+    content_type = 'text/plain; charset=utf-8'
+
+    def render(self):
+        yield f'{SHOPPING_LIST_TITLE}\n\n'
+        for name, amount, measurement_unit in self.rows():
+            yield f'{name} - {amount} {measurement_unit}.\n'
+
+
+class CsvExporter(ShoppingListExporter):
+    format = 'csv'
+    content_type = 'text/csv; charset=utf-8'
+
+    def render(self):
+        writer = csv.writer(Echo())
+        yield writer.writerow(
+            ('Ингредиент', 'Количество', 'Единицы измерения')
+        )
+        for row in self.rows():
+            yield writer.writerow(row)
+
+
+class JsonExporter(ShoppingListExporter):
+    format = 'json'
+    content_type = 'application/json'
+
+    def render(self):
+        yield '['
+        separator = ''
+        for name, amount, measurement_unit in self.rows():
+            yield separator + json.dumps(
+                {
+                    'name': name,
+                    'amount': amount,
+                    'measurement_unit': measurement_unit,
+                },
+                ensure_ascii=False,
+            )
+            separator = ','
+        yield ']'
+
+
+class PdfExporter(ShoppingListExporter):
+    format = 'pdf'
+    content_type = 'application/pdf'
+
+    def __init__(self, ingredients):
+        super().__init__(ingredients)
+        self.pdf = FPDF()
+        try:
+            self.pdf.add_font('DejaVu', '', settings.SHOPPING_LIST_PDF_FONT)
+        except (OSError, TTLibError):
+            raise PdfFontUnavailable()
+
+    def render(self):
+        pdf = self.pdf
+        pdf.set_font('DejaVu', size=16)
+        pdf.add_page()
+        pdf.cell(0, 12, SHOPPING_LIST_TITLE, new_x='LMARGIN', new_y='NEXT')
+        pdf.set_font_size(12)
+        for name, amount, measurement_unit in self.rows():
+            pdf.cell(
+                0, 8, f'{name} - {amount} {measurement_unit}.',
+                new_x='LMARGIN', new_y='NEXT'
+            )
+        yield bytes(pdf.output())
+
+
+EXPORTERS = {
+    exporter.format: exporter
+    for exporter in (TxtExporter, CsvExporter, JsonExporter, PdfExporter)
+}
@@ -1,6 +1,21 @@
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import FilterSet, filters
+from rest_framework.filters import SearchFilter
 
-from recipes.models import Ingredient, Recipe
+from recipes.models import Ingredient, Recipe, Tag
+from recipes.pantry_index import pantry_recipes
+from recipes.search import search_recipes
+
+
+POPULAR_ORDERING = 'popular'
+
+
+def get_tag_choices():
+    return [(slug, slug) for slug in Tag.objects.slug_ids()]
+
+
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    pass
 
 
 class IngredientsFilter(FilterSet):
@@ -12,16 +27,41 @@ class IngredientsFilter(FilterSet):
 
 
 class RecipesFilter(FilterSet):
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = filters.MultipleChoiceFilter(
+        choices=get_tag_choices, method='get_tags'
+    )
     is_favorited = filters.BooleanFilter(method='get_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='get_is_in_shopping_cart'
     )
+    pantry = NumberInFilter()
+    max_missing = filters.NumberFilter(min_value=0, decimal_places=0)
+    ordering = filters.ChoiceFilter(
+        choices=((POPULAR_ORDERING, 'Популярные'), ), method='get_ordering'
+    )
 
     class Meta:
         model = Recipe
         fields = ('tags', 'author', )
 
+    def filter_queryset(self, queryset):
+        pantry = self.form.cleaned_data.pop('pantry', None)
+        max_missing = self.form.cleaned_data.pop('max_missing', None)
+        queryset = super().filter_queryset(queryset)
+        if pantry:
+            queryset = pantry_recipes(
+                queryset, [int(pk) for pk in pantry], int(max_missing or 0)
+            )
+        return queryset
+
+    def get_tags(self, queryset, name, value):
+        return queryset.filter(Exists(
+            Recipe.tags.through.objects.filter(
+                tag__slug__in=value,
+                recipe_id=OuterRef('pk'),
+            )
+        ))
+
     def get_is_favorited(self, queryset, name, value):
         user = self.request.user
         if value and user.is_authenticated:
@@ -33,3 +73,16 @@ class RecipesFilter(FilterSet):
         if value and not user.is_anonymous:
             return queryset.filter(shopping_cart__user=user)
         return queryset
+
+    def get_ordering(self, queryset, name, value):
+        if value == POPULAR_ORDERING:
+            return queryset.popular()
+        return queryset
+
+
+class RecipeSearchFilter(SearchFilter):
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return search_recipes(queryset, query)
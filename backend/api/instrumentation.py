@@ -0,0 +1,137 @@
+import heapq
+import threading
+from collections import defaultdict, deque
+from functools import wraps
+from time import perf_counter
+
+from django.conf import settings
+from rest_framework import serializers
+
+PERCENTILES = (50, 95, 99)
+SLOWEST_QUERIES = 5
+
+_state = threading.local()
+
+
+def get_request_metrics():
+    return getattr(_state, 'metrics', None)
+
+
+def set_request_metrics(metrics):
+    _state.metrics = metrics
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.slowest = []
+
+    def add_query(self, sql, duration):
+        self.queries += 1
+        self.sql_time += duration
+        item = (duration, self.queries, sql)
+        if len(self.slowest) < SLOWEST_QUERIES:
+            heapq.heappush(self.slowest, item)
+        else:
+            heapq.heappushpop(self.slowest, item)
+
+    def slowest_queries(self):
+        return [
+            (duration, sql)
+            for duration, _, sql in sorted(self.slowest, reverse=True)
+        ]
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = get_request_metrics()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, perf_counter() - started)
+
+
+def timed_data(prop):
+    @wraps(prop.fget)
+    def data(self):
+        metrics = get_request_metrics()
+        if metrics is None or metrics.serializer_depth:
+            return prop.fget(self)
+        metrics.serializer_depth += 1
+        started = perf_counter()
+        try:
+            return prop.fget(self)
+        finally:
+            metrics.serializer_time += perf_counter() - started
+            metrics.serializer_depth -= 1
+    data.instrumented = True
+    return property(data)
+
+
+def instrument_serializers():
+    for serializer_class in (serializers.Serializer,
+                             serializers.ListSerializer):
+        prop = serializer_class.__dict__['data']
+        if not getattr(prop.fget, 'instrumented', False):
+            serializer_class.data = timed_data(prop)
+
+
+def percentile(values, percent):
+    index = round(percent / 100 * (len(values) - 1))
+    return values[index]
+
+
+class EndpointRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(
+            lambda: deque(maxlen=settings.INSTRUMENTATION_WINDOW)
+        )
+        self._totals = defaultdict(int)
+
+    def record(self, endpoint, sample):
+        with self._lock:
+            self._samples[endpoint].append(sample)
+            self._totals[endpoint] += 1
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+
+    def snapshot(self):
+        with self._lock:
+            samples = {
+                endpoint: list(values)
+                for endpoint, values in self._samples.items()
+            }
+            totals = dict(self._totals)
+        report = {}
+        for endpoint, values in sorted(samples.items()):
+            durations = sorted(sample['duration'] for sample in values)
+            report[endpoint] = {
+                'requests': totals[endpoint],
+                'window': len(values),
+                'duration_ms': {
+                    f'p{percent}': round(percentile(durations, percent), 2)
+                    for percent in PERCENTILES
+                },
+                **{
+                    f'avg_{field}': round(
+                        sum(sample[field] for sample in values) / len(values),
+                        2
+                    )
+                    for field in ('queries', 'sql_ms', 'serializer_ms',
+                                  'response_bytes')
+                },
+                'max_queries': max(sample['queries'] for sample in values),
+            }
+        return report
+
+
+endpoint_registry = EndpointRegistry()
@@ -0,0 +1,195 @@
+import json
+import tracemalloc
+from pathlib import Path
+from statistics import mean, quantiles
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models import IngredientsInRecipe, Recipe
+
+User = get_user_model()
+
+ENDPOINTS = {
+    'recipes_list': '/api/recipes/?limit=20',
+    'recipes_cursor': '/api/recipes/?limit=20&cursor=',
+    'recipes_popular': '/api/recipes/?limit=20&ordering=popular',
+    'recipes_search': '/api/recipes/?limit=20&search=рецепт',
+    'recipes_pantry': '/api/recipes/?limit=20&pantry={pantry}&max_missing=2',
+    'recipe_detail': '/api/recipes/{recipe_id}/',
+    'subscriptions': '/api/users/subscriptions/?limit=10&recipes_limit=3',
+    'ingredients_search': '/api/ingredients/?name=мол',
+    'download_shopping_cart': '/api/recipes/download_shopping_cart/',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет задержку, число SQL-запросов и память для основных '
+        'эндпоинтов API и сравнивает с сохраненным базовым замером'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument(
+            '--user',
+            help='Имя пользователя, от которого выполняются запросы',
+        )
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument(
+            '--endpoint',
+            action='append',
+            dest='endpoints',
+            choices=ENDPOINTS,
+            help='Эндпоинт для замера, можно указать несколько раз',
+        )
+        parser.add_argument(
+            '--output', help='Сохранить результаты в JSON-файл',
+        )
+        parser.add_argument(
+            '--compare', help='Сравнить с базовым JSON-файлом',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=1.2,
+            help='Допустимое отношение медианы к базовой',
+        )
+
+    def get_user(self, username):
+        if username:
+            user = User.objects.filter(username=username).first()
+            if user is None:
+                raise CommandError(f'Пользователь {username} не найден')
+            return user
+        user = User.objects.annotate(
+            subscriptions=Count('subscriptions_user', distinct=True),
+            cart=Count('shopping_cart', distinct=True),
+        ).order_by('-cart', '-subscriptions', 'id').first()
+        if user is None:
+            raise CommandError(
+                'В базе нет пользователей, запустите seed_data'
+            )
+        return user
+
+    def get_recipe(self):
+        recipe = Recipe.objects.order_by('-pub_date').first()
+        if recipe is None:
+            raise CommandError('В базе нет рецептов, запустите seed_data')
+        return recipe
+
+    def request(self, client, url):
+        response = client.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        if response.status_code != 200:
+            raise CommandError(
+                f'{url} вернул {response.status_code}'
+            )
+        return response
+
+    def get_urls(self, recipe):
+        pantry = ','.join(str(pk) for pk in IngredientsInRecipe.objects.filter(
+            recipe=recipe
+        ).values_list('ingredient_id', flat=True))
+        return {
+            name: url.format(recipe_id=recipe.pk, pantry=pantry)
+            for name, url in ENDPOINTS.items()
+        }
+
+    def profile(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            self.request(client, url)
+        queries = len(context.captured_queries)
+        tracemalloc.start()
+        self.request(client, url)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return queries, peak
+
+    def measure(self, client, url, iterations, warmup):
+        for _ in range(warmup):
+            self.request(client, url)
+        queries, peak = self.profile(client, url)
+        timings = []
+        for _ in range(iterations):
+            started = perf_counter()
+            self.request(client, url)
+            timings.append((perf_counter() - started) * 1000)
+        percentiles = quantiles(timings, n=100)
+        return {
+            'p50_ms': round(percentiles[49], 2),
+            'p95_ms': round(percentiles[94], 2),
+            'mean_ms': round(mean(timings), 2),
+            'queries': queries,
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
+
+    def compare(self, results, baseline, threshold):
+        regressions = []
+        for name, current in results.items():
+            previous = baseline.get('endpoints', {}).get(name)
+            if previous is None:
+                continue
+            ratio = current['p50_ms'] / previous['p50_ms']
+            verdict = 'OK'
+            if (ratio > threshold
+                    or current['queries'] > previous['queries']):
+                verdict = 'РЕГРЕССИЯ'
+                regressions.append(name)
+            self.stdout.write(
+                f'{name}: медиана {previous["p50_ms"]} -> '
+                f'{current["p50_ms"]} мс (x{ratio:.2f}), запросов '
+                f'{previous["queries"]} -> {current["queries"]}: {verdict}'
+            )
+        return regressions
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 2:
+            raise CommandError('Нужно хотя бы 2 итерации')
+        recipe = self.get_recipe()
+        user = self.get_user(options['user'])
+        client = APIClient(HTTP_HOST=options['host'])
+        client.force_authenticate(user)
+        urls = self.get_urls(recipe)
+        results = {}
+        for name in options['endpoints'] or ENDPOINTS:
+            url = urls[name]
+            results[name] = self.measure(
+                client, url, options['iterations'], options['warmup']
+            )
+            stats = results[name]
+            self.stdout.write(
+                f'{name}: p50 {stats["p50_ms"]} мс, p95 {stats["p95_ms"]} '
+                f'мс, запросов {stats["queries"]}, '
+                f'память {stats["peak_memory_kb"]} КБ'
+            )
+        report = {
+            'vendor': connection.vendor,
+            'user': user.username,
+            'recipes': Recipe.objects.count(),
+            'iterations': options['iterations'],
+            'endpoints': results,
+        }
+        if options['output']:
+            Path(options['output']).write_text(
+                json.dumps(report, ensure_ascii=False, indent=2),
+                encoding='utf-8',
+            )
+        if options['compare']:
+            baseline = json.loads(
+                Path(options['compare']).read_text(encoding='utf-8')
+            )
+            regressions = self.compare(
+                results, baseline, options['threshold']
+            )
+            if regressions:
+                raise CommandError(
+                    f'Найдены регрессии: {", ".join(regressions)}'
+                )
@@ -0,0 +1,92 @@
+from concurrent.futures import ThreadPoolExecutor
+from statistics import quantiles
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client
+
+DEFAULT_URLS = ('/api/recipes/', '/api/tags/', '/api/ingredients/')
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет число запросов в секунду к API с разными режимами '
+        'подключения к базе данных'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            action='append',
+            dest='urls',
+            help='Адрес для запросов, можно указать несколько раз',
+        )
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument(
+            '--host',
+            default='localhost',
+            help='Значение заголовка Host',
+        )
+
+    def get_modes(self, threads):
+        modes = {
+            'без сохранения соединений': {'CONN_MAX_AGE': 0, 'POOL': {}},
+            'постоянные соединения': {'CONN_MAX_AGE': 60, 'POOL': {}},
+        }
+        if connections['default'].vendor == 'postgresql':
+            modes['пул соединений'] = {
+                'CONN_MAX_AGE': 0,
+                'POOL': {'MIN_SIZE': 1, 'MAX_SIZE': threads},
+            }
+        return modes
+
+    def worker(self, urls, count, host):
+        client = Client(HTTP_HOST=host)
+        timings = []
+        errors = 0
+        for number in range(count):
+            started = perf_counter()
+            response = client.get(urls[number % len(urls)])
+            timings.append(perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+        connections.close_all()
+        return timings, errors
+
+    def run(self, urls, total, threads, host):
+        per_thread = [total // threads] * threads
+        per_thread[0] += total % threads
+        started = perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            results = list(executor.map(
+                self.worker, [urls] * threads, per_thread, [host] * threads
+            ))
+        elapsed = perf_counter() - started
+        timings = [timing for result, _ in results for timing in result]
+        errors = sum(errors for _, errors in results)
+        return elapsed, timings, errors
+
+    def handle(self, *args, **options):
+        urls = options['urls'] or DEFAULT_URLS
+        database = connections.databases['default']
+        original = {key: database.get(key) for key in ('CONN_MAX_AGE', 'POOL')}
+        try:
+            for name, mode in self.get_modes(options['threads']).items():
+                connections.close_all()
+                database.update(mode)
+                elapsed, timings, errors = self.run(
+                    urls, options['requests'], options['threads'],
+                    options['host'],
+                )
+                percentiles = quantiles(timings, n=100)
+                self.stdout.write(
+                    f'{name}: {len(timings) / elapsed:.1f} запросов/с, '
+                    f'p50 {percentiles[49] * 1000:.1f} мс, '
+                    f'p95 {percentiles[94] * 1000:.1f} мс, '
+                    f'ошибок: {errors}'
+                )
+        finally:
+            connections.close_all()
+            database.update(original)
@@ -0,0 +1,229 @@
+import random
+from io import BytesIO
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from PIL import Image
+
+from api.cache import bump_generation
+from recipes.models import (Favorite, Ingredient, IngredientsInRecipe, Recipe,
+                            ShoppingCart, ShoppingCartItem, Tag)
+from recipes.pantry_index import pantry_index
+from recipes.search import update_search_vectors
+from users.models import Subscriptions
+
+User = get_user_model()
+
+SEED_PREFIX = 'seed'
+SEED_PASSWORD = 'seed-password'
+SEED_IMAGE = 'images/seed.png'
+TAG_COLORS = ('#E26C2D', '#49B64E', '#8775D2', '#F2C94C', '#2D9CDB')
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, рецептами, '
+        'подписками, избранным и списками покупок'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes-per-user', type=int, default=10)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--tags', type=int, default=5)
+        parser.add_argument('--favorites-per-user', type=int, default=20)
+        parser.add_argument('--carts-per-user', type=int, default=5)
+        parser.add_argument('--subscriptions-per-user', type=int, default=10)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Начальное значение генератора случайных чисел',
+        )
+
+    def validate_options(self, options):
+        for option in ('users', 'recipes_per_user', 'ingredients_per_recipe',
+                       'tags', 'batch_size'):
+            if options[option] < 1:
+                raise CommandError(
+                    f'--{option.replace("_", "-")} должно быть не меньше 1'
+                )
+        for option in ('favorites_per_user', 'carts_per_user',
+                       'subscriptions_per_user'):
+            if options[option] < 0:
+                raise CommandError(
+                    f'--{option.replace("_", "-")} не может быть '
+                    'отрицательным'
+                )
+        catalogue_size = Ingredient.objects.count()
+        if options['ingredients_per_recipe'] > catalogue_size:
+            raise CommandError(
+                f'--ingredients-per-recipe больше числа ингредиентов '
+                f'в базе ({catalogue_size})'
+            )
+
+    def create_image(self):
+        if not default_storage.exists(SEED_IMAGE):
+            buffer = BytesIO()
+            Image.new('RGB', (64, 64), '#E26C2D').save(buffer, 'PNG')
+            default_storage.save(SEED_IMAGE, ContentFile(buffer.getvalue()))
+
+    def create_tags(self, count):
+        Tag.objects.bulk_create(
+            [
+                Tag(
+                    name=f'{SEED_PREFIX}-{number}',
+                    color=TAG_COLORS[number % len(TAG_COLORS)],
+                    slug=f'{SEED_PREFIX}-{number}',
+                )
+                for number in range(count)
+            ],
+            ignore_conflicts=True,
+        )
+        return list(Tag.objects.filter(
+            slug__startswith=f'{SEED_PREFIX}-'
+        ).values_list('id', flat=True))
+
+    def create_users(self, count, batch_size):
+        start = User.objects.filter(
+            username__startswith=f'{SEED_PREFIX}_user_'
+        ).count()
+        password = make_password(SEED_PASSWORD)
+        users = [
+            User(
+                username=f'{SEED_PREFIX}_user_{number}',
+                email=f'{SEED_PREFIX}_user_{number}@example.com',
+                first_name='Сид',
+                last_name=f'Пользователь {number}',
+                password=password,
+            )
+            for number in range(start, start + count)
+        ]
+        User.objects.bulk_create(users, batch_size=batch_size)
+        return list(User.objects.filter(
+            username__in=[user.username for user in users]
+        ).values_list('id', flat=True))
+
+    def create_recipes(self, user_ids, per_user, batch_size):
+        first_id = Recipe.objects.order_by('-id').values_list(
+            'id', flat=True
+        ).first() or 0
+        Recipe.objects.bulk_create(
+            [
+                Recipe(
+                    name=f'Рецепт {author_id}-{number}',
+                    text=f'Синтетический рецепт {number} автора {author_id}',
+                    image=SEED_IMAGE,
+                    author_id=author_id,
+                    cooking_time=self.random.randint(5, 180),
+                    servings=self.random.randint(1, 6),
+                )
+                for author_id in user_ids
+                for number in range(per_user)
+            ],
+            batch_size=batch_size,
+        )
+        return list(Recipe.objects.filter(
+            id__gt=first_id, author_id__in=user_ids
+        ).values_list('id', flat=True))
+
+    def create_recipe_links(self, recipe_ids, tag_ids, per_recipe,
+                            batch_size):
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        IngredientsInRecipe.objects.bulk_create(
+            (
+                IngredientsInRecipe(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=self.random.randint(1, 500),
+                )
+                for recipe_id in recipe_ids
+                for ingredient_id in self.random.sample(
+                    ingredient_ids, per_recipe
+                )
+            ),
+            batch_size=batch_size,
+        )
+        RecipeTag = Recipe.tags.through
+        RecipeTag.objects.bulk_create(
+            (
+                RecipeTag(recipe_id=recipe_id, tag_id=tag_id)
+                for recipe_id in recipe_ids
+                for tag_id in self.random.sample(
+                    tag_ids, self.random.randint(1, min(3, len(tag_ids)))
+                )
+            ),
+            batch_size=batch_size,
+        )
+
+    def create_user_links(self, model, field, user_ids, target_ids, per_user,
+                          batch_size):
+        objs = []
+        for user_id in user_ids:
+            targets = [
+                target_id for target_id in self.random.sample(
+                    target_ids, min(per_user + 1, len(target_ids))
+                )
+                if not (field == 'author_id' and target_id == user_id)
+            ][:per_user]
+            objs.extend(
+                model(user_id=user_id, **{field: target_id})
+                for target_id in targets
+            )
+        model.objects.bulk_create(
+            objs, batch_size=batch_size, ignore_conflicts=True
+        )
+        return len(objs)
+
+    def handle(self, *args, **options):
+        started = perf_counter()
+        self.random = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        if not Ingredient.objects.exists():
+            call_command('load_ingredients', stdout=self.stdout)
+        self.validate_options(options)
+        self.create_image()
+        with transaction.atomic():
+            tag_ids = self.create_tags(options['tags'])
+            user_ids = self.create_users(options['users'], batch_size)
+            recipe_ids = self.create_recipes(
+                user_ids, options['recipes_per_user'], batch_size
+            )
+            self.create_recipe_links(
+                recipe_ids, tag_ids, options['ingredients_per_recipe'],
+                batch_size,
+            )
+            counts = {
+                'подписок': self.create_user_links(
+                    Subscriptions, 'author_id', user_ids, user_ids,
+                    options['subscriptions_per_user'], batch_size,
+                ),
+                'избранного': self.create_user_links(
+                    Favorite, 'recipe_id', user_ids, recipe_ids,
+                    options['favorites_per_user'], batch_size,
+                ),
+                'списков покупок': self.create_user_links(
+                    ShoppingCart, 'recipe_id', user_ids, recipe_ids,
+                    options['carts_per_user'], batch_size,
+                ),
+            }
+            ShoppingCartItem.objects.rebuild()
+            Recipe.objects.reconcile_counters()
+            update_search_vectors(
+                Recipe.objects.filter(author_id__in=user_ids)
+            )
+        for namespace in ('recipes', 'tags', 'users'):
+            bump_generation(namespace)
+        pantry_index.mark_changed()
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {len(user_ids)}, '
+            f'рецептов: {len(recipe_ids)}, '
+            + ', '.join(f'{name}: {count}' for name, count in counts.items())
+            + f'. Время: {perf_counter() - started:.2f} с. '
+            f'Пароль пользователей: {SEED_PASSWORD}'
+        ))
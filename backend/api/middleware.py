@@ -0,0 +1,67 @@
+import logging
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+
+from api.instrumentation import (RequestMetrics, endpoint_registry,
+                                 record_query, set_request_metrics)
+
+logger = logging.getLogger('api.instrumentation')
+
+
+def get_endpoint(request):
+    match = request.resolver_match
+    view_name = match.view_name if match is not None else 'unresolved'
+    return f'{request.method} {view_name}'
+
+
+class InstrumentationMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        set_request_metrics(metrics)
+        started = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(record_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            set_request_metrics(None)
+        duration = (perf_counter() - started) * 1000
+        sql_time = metrics.sql_time * 1000
+        serializer_time = metrics.serializer_time * 1000
+        response_bytes = (
+            0 if response.streaming else len(response.content)
+        )
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={sql_time:.2f};desc="{metrics.queries} queries"',
+            f'serialize;dur={serializer_time:.2f}',
+            f'total;dur={duration:.2f}',
+        ))
+        endpoint = get_endpoint(request)
+        endpoint_registry.record(endpoint, {
+            'duration': duration,
+            'queries': metrics.queries,
+            'sql_ms': sql_time,
+            'serializer_ms': serializer_time,
+            'response_bytes': response_bytes,
+        })
+        if duration >= settings.INSTRUMENTATION_SLOW_REQUEST_MS:
+            logger.warning(
+                'Медленный запрос %s %s: %.1f мс, запросов к БД: %d '
+                '(%.1f мс), сериализация: %.1f мс. Самые долгие SQL:\n%s',
+                endpoint, request.get_full_path(), duration,
+                metrics.queries, sql_time, serializer_time,
+                '\n'.join(
+                    f'{query_time * 1000:.1f} мс: {sql}'
+                    for query_time, sql in metrics.slowest_queries()
+                ),
+            )
+        return response
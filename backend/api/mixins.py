@@ -1,6 +1,41 @@
+from rest_framework.exceptions import ValidationError
 from rest_framework.mixins import ListModelMixin, RetrieveModelMixin
 from rest_framework.viewsets import GenericViewSet
 
 
 class CustomMixin(ListModelMixin, RetrieveModelMixin, GenericViewSet):
     pass
+
+
+class KeysetPaginationMixin:
+    keyset_pagination_class = None
+    keyset_incompatible_params = ()
+    keyset_conflict_message = 'Нельзя сочетать с курсорной пагинацией'
+
+    def get_keyset_conflicts(self):
+        return [
+            param for param in self.keyset_incompatible_params
+            if self.request.query_params.get(param)
+        ]
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            pagination_class = self.pagination_class
+            keyset_pagination_class = self.keyset_pagination_class
+            if pagination_class is keyset_pagination_class is not None:
+                conflicts = self.get_keyset_conflicts()
+                if conflicts:
+                    raise ValidationError(dict.fromkeys(
+                        conflicts, self.keyset_conflict_message
+                    ))
+            elif (keyset_pagination_class is not None
+                    and pagination_class is not None
+                    and keyset_pagination_class.cursor_query_param
+                    in self.request.query_params
+                    and not self.get_keyset_conflicts()):
+                pagination_class = keyset_pagination_class
+            self._paginator = (
+                pagination_class() if pagination_class is not None else None
+            )
+        return self._paginator
@@ -0,0 +1,51 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(
+            data,
+            default=self.encoder.default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+
+
+class PrometheusRenderer(BaseRenderer):
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+    metric_prefix = 'foodgram_http'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        lines = []
+        for endpoint, stats in (data or {}).items():
+            method, view_name = endpoint.split(' ', 1)
+            labels = f'method="{method}",view="{view_name}"'
+            lines.append(
+                f'{self.metric_prefix}_requests_total{{{labels}}} '
+                f'{stats["requests"]}'
+            )
+            for name, value in stats['duration_ms'].items():
+                quantile = int(name[1:]) / 100
+                lines.append(
+                    f'{self.metric_prefix}_duration_ms'
+                    f'{{{labels},quantile="{quantile}"}} {value}'
+                )
+            for name, value in stats.items():
+                if name.startswith(('avg_', 'max_')):
+                    lines.append(
+                        f'{self.metric_prefix}_{name}{{{labels}}} {value}'
+                    )
+        return '\n'.join(lines) + '\n'
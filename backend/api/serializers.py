@@ -1,16 +1,46 @@
+from operator import attrgetter
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from recipes.images import schedule_renditions
+from recipes.search import update_search_vectors
 from recipes.models import (Favorite, Ingredient, IngredientsInRecipe,
-                            Recipe, ShoppingCart, Tag)
+                            Recipe, ShoppingCart, ShoppingCartItem, Tag,
+                            recipe_ingredients_changed)
 from users.models import Subscriptions
 
 User = get_user_model()
 
 
+def get_recipes_limit(request):
+    limit = request.GET.get('recipes_limit') if request else None
+    if limit and limit.isdigit():
+        return int(limit)
+    return None
+
+
+class RenditionImageField(serializers.ReadOnlyField):
+
+    def __init__(self, rendition, **kwargs):
+        self.rendition = rendition
+        kwargs['source'] = '*'
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        image = getattr(recipe, self.rendition) or recipe.image
+        if not image:
+            return None
+        request = self.context.get('request')
+        if request is None:
+            return image.url
+        return request.build_absolute_uri(image.url)
+
+
 class CustomUserReadSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
 
@@ -21,10 +51,11 @@ class CustomUserReadSerializer(serializers.ModelSerializer):
 
     def get_is_subscribed(self, obj):
         request = self.context.get('request')
-        return (request and request.user.is_authenticated
-                and request.user.subscriptions_user.filter(
-                    author=obj
-                ).exists())
+        if not (request and request.user.is_authenticated):
+            return False
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return request.user.subscriptions_user.filter(author=obj).exists()
 
 
 class CustomUserCreateSerializer(serializers.ModelSerializer):
@@ -52,17 +83,21 @@ class SubscriptionReadSerializer(serializers.ModelSerializer):
 
     def get_is_subscribed(self, obj):
         request = self.context.get('request')
-        return (request and request.user.is_authenticated
-                and request.user.subscriptions_user.filter(
-                    author=obj
-                ).exists())
+        if not (request and request.user.is_authenticated):
+            return False
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return request.user.subscriptions_user.filter(author=obj).exists()
 
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        limit = request.GET.get('recipes_limit')
-        recipes = obj.recipes.all()
-        if limit:
-            recipes = recipes[:int(limit)]
+        if hasattr(obj, 'limited_recipes'):
+            recipes = obj.limited_recipes
+        else:
+            request = self.context.get('request')
+            limit = get_recipes_limit(request)
+            recipes = obj.recipes.all()
+            if limit:
+                recipes = recipes[:limit]
         serializer = RecipeForOtherModelsSerializer(
             recipes,
             many=True,
@@ -71,27 +106,36 @@ class SubscriptionReadSerializer(serializers.ModelSerializer):
         return serializer.data
 
     def get_recipes_count(self, obj):
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
         return obj.recipes.count()
 
 
-class SubscriptionCreateSerializer(serializers.ModelSerializer):
+class UniqueRelationSerializer(serializers.ModelSerializer):
+    duplicate_message = None
+
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            raise ValidationError(self.duplicate_message)
+
+
+class SubscriptionCreateSerializer(UniqueRelationSerializer):
+    duplicate_message = 'Нельзя подписаться два раза'
 
     class Meta:
         model = Subscriptions
         fields = ('user', 'author')
+        read_only_fields = fields
 
-    def validate(self, data):
-        user = data.get('user')
-        author = data.get('author')
-        if user == author:
+    def create(self, validated_data):
+        if validated_data['user'] == validated_data['author']:
             raise ValidationError(
                 'Нельзя подписаться на себя'
             )
-        if Subscriptions.objects.filter(user=user, author=author).exists():
-            raise ValidationError(
-                'Нельзя подписаться два раза'
-            )
-        return data
+        return super().create(validated_data)
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -123,7 +167,7 @@ class IngredientsInRecipeReadSerializer(serializers.ModelSerializer):
 
 class IngredientsInRecipeCreateSerializer(serializers.ModelSerializer):
 
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = serializers.IntegerField(min_value=1)
 
     class Meta:
         model = IngredientsInRecipe
@@ -136,7 +180,7 @@ class RecipeReadSerializer(serializers.ModelSerializer):
     ingredients = IngredientsInRecipeReadSerializer(
         many=True, read_only=True, source='ingredients_list'
     )
-    image = Base64ImageField()
+    image = RenditionImageField('image_medium')
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
@@ -144,21 +188,89 @@ class RecipeReadSerializer(serializers.ModelSerializer):
         model = Recipe
         fields = ('id', 'tags', 'author', 'ingredients', 'is_favorited',
                   'is_in_shopping_cart', 'name', 'image', 'text',
-                  'cooking_time')
+                  'cooking_time', 'servings')
 
     def get_is_favorited(self, obj):
         user = self.context.get('request').user
         if user.is_anonymous:
             return False
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         return user.favorites.filter(recipe=obj).exists()
 
     def get_is_in_shopping_cart(self, obj):
         user = self.context.get('request').user
         if user.is_anonymous:
             return False
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         return user.shopping_cart.filter(recipe=obj).exists()
 
 
+class RecipeListSerializer(serializers.BaseSerializer):
+    tag_fields = ('id', 'name', 'color', 'slug')
+    author_fields = ('id', 'username', 'email', 'first_name', 'last_name')
+    ingredient_fields = ('id', 'name', 'measurement_unit')
+    get_tag = attrgetter(*tag_fields)
+    get_author = attrgetter(*author_fields)
+    get_ingredient = attrgetter(*ingredient_fields)
+
+    def to_representation(self, recipe):
+        request = self.context.get('request')
+        user = request.user if request else None
+        authenticated = bool(user and user.is_authenticated)
+        author = recipe.author
+        if not authenticated:
+            is_subscribed = is_favorited = is_in_shopping_cart = False
+        else:
+            is_subscribed = getattr(author, 'is_subscribed', None)
+            if is_subscribed is None:
+                is_subscribed = user.subscriptions_user.filter(
+                    author=author
+                ).exists()
+            is_favorited = getattr(recipe, 'is_favorited', None)
+            if is_favorited is None:
+                is_favorited = user.favorites.filter(recipe=recipe).exists()
+            is_in_shopping_cart = getattr(recipe, 'is_in_shopping_cart', None)
+            if is_in_shopping_cart is None:
+                is_in_shopping_cart = user.shopping_cart.filter(
+                    recipe=recipe
+                ).exists()
+        image = recipe.image_medium or recipe.image
+        image_url = None
+        if image:
+            image_url = image.url
+            if request is not None:
+                image_url = request.build_absolute_uri(image_url)
+        author_data = dict(zip(self.author_fields, self.get_author(author)))
+        author_data['is_subscribed'] = is_subscribed
+        return {
+            'id': recipe.id,
+            'tags': [
+                dict(zip(self.tag_fields, self.get_tag(tag)))
+                for tag in recipe.tags.all()
+            ],
+            'author': author_data,
+            'ingredients': [
+                {
+                    **dict(zip(
+                        self.ingredient_fields,
+                        self.get_ingredient(item.ingredient)
+                    )),
+                    'amount': item.amount,
+                }
+                for item in recipe.ingredients_list.all()
+            ],
+            'is_favorited': is_favorited,
+            'is_in_shopping_cart': is_in_shopping_cart,
+            'name': recipe.name,
+            'image': image_url,
+            'text': recipe.text,
+            'cooking_time': recipe.cooking_time,
+            'servings': recipe.servings,
+        }
+
+
 class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
 
     tags = serializers.PrimaryKeyRelatedField(
@@ -172,26 +284,54 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
         model = Recipe
         fields = (
             'name', 'author', 'tags', 'ingredients',
-            'text', 'image', 'cooking_time',
+            'text', 'image', 'cooking_time', 'servings',
         )
 
+    def validate_ingredients(self, ingredients):
+        ingredient_ids = [item['id'] for item in ingredients]
+        if len(set(ingredient_ids)) != len(ingredient_ids):
+            raise ValidationError('Ингредиенты не должны повторяться')
+        missing = set(ingredient_ids) - set(Ingredient.objects.filter(
+            pk__in=ingredient_ids
+        ).values_list('pk', flat=True))
+        if missing:
+            raise ValidationError(
+                f'Ингредиенты не найдены: {sorted(missing)}'
+            )
+        return ingredients
+
     def create(self, validated_data):
         author = self.context.get('request').user
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
-        recipe = Recipe.objects.create(author=author, **validated_data)
-        self.get_ingredient_list(recipe, ingredients)
-        recipe.tags.set(tags)
+        with transaction.atomic():
+            recipe = Recipe.objects.create(author=author, **validated_data)
+            self.get_ingredient_list(recipe, ingredients)
+            update_search_vectors(Recipe.objects.filter(pk=recipe.pk))
+            recipe.tags.set(tags)
+            schedule_renditions(recipe)
         return recipe
 
     def update(self, recipe, validated_data):
-        tags = validated_data.pop('tags')
-        ingredients = validated_data.pop('ingredients')
-        recipe = super().update(recipe, validated_data)
-        recipe.tags.clear()
-        recipe.tags.set(tags)
-        recipe.ingredients.clear()
-        self.get_ingredient_list(recipe, ingredients)
+        tags = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('ingredients', None)
+        servings = recipe.servings
+        with transaction.atomic():
+            for field, value in validated_data.items():
+                setattr(recipe, field, value)
+            recipe.save(update_fields=list(validated_data))
+            if 'image' in validated_data:
+                schedule_renditions(recipe)
+            if tags is not None:
+                recipe.tags.set(tags)
+            if ingredients is not None:
+                self.update_ingredient_list(recipe, ingredients)
+            if recipe.servings != servings:
+                ShoppingCartItem.objects.change_servings(recipe)
+            if ingredients is not None or any(
+                field in validated_data for field in ('name', 'text')
+            ):
+                update_search_vectors(Recipe.objects.filter(pk=recipe.pk))
         return recipe
 
     def get_ingredient_list(self, recipe, ingredients):
@@ -199,49 +339,104 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
         for item in ingredients:
             ingr_list.append(IngredientsInRecipe(
                 recipe=recipe,
-                ingredient=item['id'],
+                ingredient_id=item['id'],
                 amount=item['amount']
             ))
         IngredientsInRecipe.objects.bulk_create(ingr_list)
+        recipe_ingredients_changed.send(
+            sender=IngredientsInRecipe, recipe_ids=[recipe.pk]
+        )
+
+    def update_ingredient_list(self, recipe, ingredients):
+        new_amounts = {item['id']: item['amount'] for item in ingredients}
+        current = {
+            item.ingredient_id: item
+            for item in IngredientsInRecipe.objects.filter(recipe=recipe)
+        }
+        old_amounts = {
+            ingredient_id: item.amount
+            for ingredient_id, item in current.items()
+        }
+        removed = [
+            item.pk for ingredient_id, item in current.items()
+            if ingredient_id not in new_amounts
+        ]
+        changed = []
+        for ingredient_id, item in current.items():
+            amount = new_amounts.get(ingredient_id, item.amount)
+            if amount != item.amount:
+                item.amount = amount
+                changed.append(item)
+        added = [
+            IngredientsInRecipe(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount
+            )
+            for ingredient_id, amount in new_amounts.items()
+            if ingredient_id not in current
+        ]
+        if removed:
+            IngredientsInRecipe.objects.filter(pk__in=removed).delete()
+        if changed:
+            IngredientsInRecipe.objects.bulk_update(changed, ['amount'])
+        if added:
+            IngredientsInRecipe.objects.bulk_create(added)
+        if changed or added:
+            recipe_ingredients_changed.send(
+                sender=IngredientsInRecipe, recipe_ids=[recipe.pk]
+            )
+        if removed or changed or added:
+            ShoppingCartItem.objects.change_recipe(
+                recipe, old_amounts, new_amounts
+            )
 
     def to_representation(self, recipe):
+        recipe = Recipe.objects.for_read(
+            self.context.get('request').user
+        ).get(pk=recipe.pk)
         return RecipeReadSerializer(recipe, context=self.context).data
 
 
 class RecipeForOtherModelsSerializer(serializers.ModelSerializer):
+    image = RenditionImageField('image_thumbnail')
 
     class Meta:
         model = Recipe
         fields = ('id', 'name', 'image', 'cooking_time')
 
 
-class FavoriteSerializer(serializers.ModelSerializer):
+class FavoriteSerializer(UniqueRelationSerializer):
+    duplicate_message = 'Нельзя добавить рецепт два раза'
 
     class Meta:
         model = Favorite
-        fields = '__all__'
-
-    def validate(self, data):
-        user = data.get('user')
-        recipe = data.get('recipe')
-        if Favorite.objects.filter(user=user, recipe=recipe).exists():
-            raise ValidationError(
-                'Нельзя добавить рецепт два раза'
-            )
-        return data
+        fields = ('user', 'recipe')
+        read_only_fields = fields
 
 
-class ShoppingCartSerializer(serializers.ModelSerializer):
+class ShoppingCartSerializer(UniqueRelationSerializer):
+    duplicate_message = 'Нельзя добавить рецепт два раза'
 
     class Meta:
         model = ShoppingCart
-        fields = '__all__'
-
-    def validate(self, data):
-        user = data.get('user')
-        recipe = data.get('recipe')
-        if ShoppingCart.objects.filter(user=user, recipe=recipe).exists():
-            raise ValidationError(
-                'Нельзя добавить рецепт два раза'
+        fields = ('user', 'recipe', 'servings')
+        read_only_fields = ('user', 'recipe')
+
+    def update(self, cart, validated_data):
+        servings = cart.servings
+        with transaction.atomic():
+            cart = super().update(cart, validated_data)
+            ShoppingCartItem.objects.remove_recipe(
+                cart.user_id, cart.recipe_id, servings
+            )
+            ShoppingCartItem.objects.add_recipe(
+                cart.user_id, cart.recipe_id, cart.servings
             )
-        return data
+        return cart
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=100,
+    )
@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from api.cache import (POPULARITY_NAMESPACE, bump_generation,
+                       user_state_namespace)
+from recipes.models import (Favorite, Ingredient, IngredientsInRecipe, Recipe,
+                            ShoppingCart, Tag, user_recipes_changed)
+from users.models import Subscriptions
+
+User = get_user_model()
+
+CACHE_NAMESPACES = {
+    Recipe: 'recipes',
+    IngredientsInRecipe: 'recipes',
+    Tag: 'tags',
+    Ingredient: 'ingredients',
+    User: 'users',
+}
+
+
+def bump_on_commit(namespace):
+    transaction.on_commit(lambda: bump_generation(namespace))
+
+
+def invalidate_response_cache(sender, **kwargs):
+    if sender is User and kwargs.get('update_fields') == {'last_login'}:
+        return
+    bump_on_commit(CACHE_NAMESPACES[sender])
+
+
+for model in CACHE_NAMESPACES:
+    post_save.connect(invalidate_response_cache, sender=model)
+    post_delete.connect(invalidate_response_cache, sender=model)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+def invalidate_popularity(sender, **kwargs):
+    bump_on_commit(POPULARITY_NAMESPACE)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_save, sender=Subscriptions)
+@receiver(post_delete, sender=Subscriptions)
+def invalidate_user_state(sender, instance, **kwargs):
+    bump_on_commit(user_state_namespace(instance.user_id))
+
+
+@receiver(user_recipes_changed, sender=Favorite)
+@receiver(user_recipes_changed, sender=ShoppingCart)
+def invalidate_bulk_user_recipes(sender, user_id, **kwargs):
+    bump_on_commit(user_state_namespace(user_id))
+    bump_on_commit(POPULARITY_NAMESPACE)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tags_cache(sender, action, **kwargs):
+    if action.startswith('post_'):
+        bump_on_commit('recipes')
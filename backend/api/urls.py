@@ -1,8 +1,8 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import (TagViewSet, RecipeViewSet, CustomUserViewSet,
-                    IngredientViewSet)
+from .views import (CacheMetricsView, TagViewSet, RecipeViewSet,
+                    CustomUserViewSet, IngredientViewSet, RequestMetricsView)
 
 
 app_name = 'api'
@@ -17,4 +17,6 @@ router.register('ingredients', IngredientViewSet, basename='ingredients')
 urlpatterns = [
     path('', include(router.urls)),
     path('auth/', include('djoser.urls.authtoken')),
+    path('_metrics/cache/', CacheMetricsView.as_view(), name='cache-metrics'),
+    path('_metrics/', RequestMetricsView.as_view(), name='request-metrics'),
 ]
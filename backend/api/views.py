@@ -1,35 +1,50 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.db.models import (BooleanField, Count, OuterRef, Prefetch,
+                              Subquery, Sum, Value)
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 
 from api.serializers import (
     TagSerializer, IngredientSerializer,
     FavoriteSerializer, RecipeReadSerializer, RecipeCreateUpdateSerializer,
+    RecipeListSerializer, RecipeIdsSerializer,
     ShoppingCartSerializer, SubscriptionCreateSerializer,
-    SubscriptionReadSerializer, RecipeForOtherModelsSerializer
+    SubscriptionReadSerializer, RecipeForOtherModelsSerializer,
+    get_recipes_limit
 )
-from api.filters import IngredientsFilter, RecipesFilter
-from api.pagination import CustomPaginator
+from api.cache import (POPULARITY_NAMESPACE, CachedResponseMixin,
+                       ConditionalResponseMixin, get_cache_metrics)
+from api.exporters import EXPORTERS
+from api.instrumentation import endpoint_registry
+from api.filters import (POPULAR_ORDERING, IngredientsFilter,
+                         RecipesFilter, RecipeSearchFilter)
+from api.pagination import (CustomPaginator, KeysetPaginator, RankedPaginator,
+                            UserKeysetPaginator)
 from api.permissions import IsAuthorOrReadOnly
-from recipes.models import (Favorite, Ingredient, IngredientsInRecipe, Recipe,
-                            Tag, ShoppingCart)
-from api.mixins import CustomMixin
+from api.renderers import FastJSONRenderer, PrometheusRenderer
+from recipes.ingredient_index import ingredient_index
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeSimilarity,
+                            ShoppingCart, ShoppingCartItem, Tag)
+from recipes.similarity import TOP_K
+from api.mixins import CustomMixin, KeysetPaginationMixin
 from users.models import Subscriptions
 
 User = get_user_model()
 
+SIMILAR_LIMIT = 10
 
-class CustomUserViewSet(UserViewSet):
+
+class CustomUserViewSet(KeysetPaginationMixin, UserViewSet):
     http_method_names = ('get', 'post', 'delete')
     pagination_class = CustomPaginator
+    keyset_pagination_class = UserKeysetPaginator
     permission_classes = (AllowAny, )
 
     @action(
@@ -40,22 +55,25 @@ class CustomUserViewSet(UserViewSet):
     def subscribe(self, request, id=None):
         user = request.user
         author = get_object_or_404(User, id=id)
-        subscription = Subscriptions.objects.filter(
-            user=user, author=author
-        )
         if request.method == 'DELETE':
-            subscription.delete
+            deleted, _ = Subscriptions.objects.filter(
+                user=user, author=author
+            ).delete()
+            if not deleted:
+                return Response(
+                    'Вы не подписаны на этого автора',
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             return Response(
                 'Вы отписались от этого автора',
                 status=status.HTTP_204_NO_CONTENT
             )
-        data = {'user': user.id, 'author': author.id}
         create_serializer = SubscriptionCreateSerializer(
-            data=data,
+            data={},
             context={'request': request}
         )
-        create_serializer.is_valid()
-        create_serializer.save()
+        create_serializer.is_valid(raise_exception=True)
+        create_serializer.save(user=user, author=author)
         read_serializer = SubscriptionReadSerializer(
             author,
             context={'request': request}
@@ -70,7 +88,31 @@ class CustomUserViewSet(UserViewSet):
     )
     def subscriptions(self, request):
         user = request.user
-        queryset = User.objects.filter(subscribers_author__user=user)
+        recipes = Recipe.objects.only(
+            'id', 'name', 'image', 'image_thumbnail', 'cooking_time',
+            'author_id', 'pub_date',
+        )
+        limit = get_recipes_limit(request)
+        if limit:
+            recipes = recipes.filter(pk__in=Subquery(
+                Recipe.objects.filter(
+                    author=OuterRef('author')
+                ).values('pk')[:limit]
+            ))
+        queryset = (
+            User.objects
+            .filter(subscribers_author__user=user)
+            .annotate(
+                recipes_count=Count('recipes'),
+                is_subscribed=Value(True, output_field=BooleanField()),
+            )
+            .prefetch_related(
+                Prefetch(
+                    'recipes', queryset=recipes, to_attr='limited_recipes'
+                )
+            )
+            .order_by('username')
+        )
         pages = self.paginate_queryset(queryset)
         serializer = SubscriptionReadSerializer(
             pages, many=True, context={'request': request}
@@ -78,29 +120,63 @@ class CustomUserViewSet(UserViewSet):
         return self.get_paginated_response(serializer.data)
 
 
-class IngredientViewSet(CustomMixin):
+class IngredientViewSet(CachedResponseMixin, CustomMixin):
+    cache_namespace = 'ingredients'
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     filter_backends = (DjangoFilterBackend, )
     filterset_class = IngredientsFilter
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if name:
+            return Response(ingredient_index.search(name))
+        return super().list(request, *args, **kwargs)
+
 
-class TagViewSet(CustomMixin):
+class TagViewSet(CachedResponseMixin, CustomMixin):
+    cache_namespace = 'tags'
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
 
 
-class RecipeViewSet(ModelViewSet):
-    queryset = Recipe.objects.all()
+class RecipeViewSet(ConditionalResponseMixin, CachedResponseMixin,
+                    KeysetPaginationMixin, ModelViewSet):
+    cache_namespace = 'recipes'
+    cache_dependencies = ('tags', 'ingredients', 'users')
+    conditional_dependencies = ('recipes', 'tags', 'ingredients', 'users')
+    cache_anonymous_only = True
     http_method_names = ('get', 'post', 'patch', 'delete')
     permission_classes = (IsAuthorOrReadOnly, )
-    pagination_class = CustomPaginator
-    filter_backends = (DjangoFilterBackend, )
+    pagination_class = RankedPaginator
+    keyset_pagination_class = KeysetPaginator
+    keyset_incompatible_params = ('search', 'pantry', 'ordering')
+    filter_backends = (DjangoFilterBackend, RecipeSearchFilter)
     filterset_class = RecipesFilter
 
+    def get_queryset(self):
+        return Recipe.objects.for_read(self.request.user)
+
+    def is_popular_ordering(self):
+        return self.request.query_params.get('ordering') == POPULAR_ORDERING
+
+    def get_cache_dependencies(self):
+        dependencies = super().get_cache_dependencies()
+        if self.is_popular_ordering():
+            return (*dependencies, POPULARITY_NAMESPACE)
+        return dependencies
+
+    def get_conditional_dependencies(self):
+        dependencies = super().get_conditional_dependencies()
+        if self.is_popular_ordering():
+            return (*dependencies, POPULARITY_NAMESPACE)
+        return dependencies
+
     def get_serializer_class(self):
+        if self.action in ('list', 'feed', 'similar', 'recommendations'):
+            return RecipeListSerializer
         if self.request.method in ('GET', 'DELETE'):
             return RecipeReadSerializer
         return RecipeCreateUpdateSerializer
@@ -108,10 +184,8 @@ class RecipeViewSet(ModelViewSet):
     def add_delete_recipe(self, serializer, pk, request, model):
         user = request.user
         recipe = get_object_or_404(Recipe, pk=pk)
-        object = model.objects.filter(user=user, recipe=recipe)
         if request.method == 'DELETE':
-            delete = object.delete()
-            if delete[0] == 0:
+            if not model.objects.bulk_remove(user, [recipe.pk]):
                 return Response(
                     'Такого рецепта нет',
                     status=status.HTTP_400_BAD_REQUEST
@@ -120,19 +194,122 @@ class RecipeViewSet(ModelViewSet):
                 'Рецепт удален из корзины',
                 status=status.HTTP_204_NO_CONTENT
             )
-        data = {'user': user.id, 'recipe': recipe.id}
         create_serializer = serializer(
-            data=data,
+            data=request.data,
             context={'request': request}
         )
-        create_serializer.is_valid()
-        create_serializer.save()
+        create_serializer.is_valid(raise_exception=True)
+        create_serializer.save(user=user, recipe=recipe)
         read_serializer = RecipeForOtherModelsSerializer(
             recipe,
             context={'request': request}
         )
         return Response(read_serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(
+        detail=False,
+        methods=('get',),
+        permission_classes=(IsAuthenticated,),
+        pagination_class=KeysetPaginator,
+    )
+    def feed(self, request):
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            author_id__in=Subscriptions.objects.filter(
+                user=request.user
+            ).values('author_id')
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def get_similar_limit(self, request):
+        limit = request.query_params.get('limit')
+        if limit and limit.isdigit():
+            return min(int(limit), TOP_K)
+        return SIMILAR_LIMIT
+
+    @action(detail=True, methods=('get',))
+    def similar(self, request, pk=None):
+        get_object_or_404(Recipe.objects.only('pk'), pk=pk)
+        recipes = self.get_queryset().filter(
+            similar_for__recipe_id=pk
+        ).order_by('-similar_for__score', 'id')[
+            :self.get_similar_limit(request)
+        ]
+        serializer = self.get_serializer(recipes, many=True)
+        return Response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=('get',),
+        permission_classes=(IsAuthenticated,),
+    )
+    def recommendations(self, request):
+        user = request.user
+        limit = self.get_similar_limit(request)
+        liked = set(Favorite.objects.filter(
+            user=user
+        ).values_list('recipe_id', flat=True)).union(
+            ShoppingCart.objects.filter(
+                user=user
+            ).values_list('recipe_id', flat=True)
+        )
+        recipe_ids = list(RecipeSimilarity.objects.filter(
+            recipe_id__in=liked
+        ).exclude(
+            similar_id__in=liked
+        ).exclude(
+            similar__author=user
+        ).values('similar_id').annotate(
+            total=Sum('score')
+        ).order_by('-total', 'similar_id').values_list(
+            'similar_id', flat=True
+        )[:limit])
+        recipes = self.get_queryset().in_bulk(recipe_ids)
+        recipes = [recipes[pk] for pk in recipe_ids if pk in recipes]
+        if len(recipes) < limit:
+            recipes.extend(self.get_queryset().exclude(
+                id__in=liked.union(recipe_ids)
+            ).exclude(author=user).popular()[:limit - len(recipes)])
+        serializer = self.get_serializer(recipes, many=True)
+        return Response(serializer.data)
+
+    def bulk_add_delete_recipes(self, request, model):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = list(dict.fromkeys(
+            serializer.validated_data['recipes']
+        ))
+        if request.method == 'DELETE':
+            removed = set(model.objects.bulk_remove(request.user, recipe_ids))
+            return Response({'results': [
+                {
+                    'id': recipe_id,
+                    'status': 'removed' if recipe_id in removed else 'absent',
+                }
+                for recipe_id in recipe_ids
+            ]})
+        recipes = Recipe.objects.in_bulk(recipe_ids)
+        added = set(model.objects.bulk_add(request.user, list(recipes)))
+        results = []
+        for recipe_id in recipe_ids:
+            recipe = recipes.get(recipe_id)
+            if recipe is None:
+                results.append({'id': recipe_id, 'status': 'not_found'})
+                continue
+            results.append({
+                'id': recipe_id,
+                'status': 'added' if recipe_id in added else 'exists',
+                'recipe': RecipeForOtherModelsSerializer(
+                    recipe, context={'request': request}
+                ).data,
+            })
+        return Response({'results': results})
+
+    def clear_recipes(self, request, model):
+        removed = model.objects.bulk_remove(request.user)
+        return Response({'removed': len(removed)})
+
     @action(detail=True, methods=['post', 'delete'],
             permission_classes=[IsAuthenticated, ])
     def favorite(self, request, pk):
@@ -140,43 +317,87 @@ class RecipeViewSet(ModelViewSet):
         model = Favorite
         return self.add_delete_recipe(serializer, pk, request, model)
 
-    @action(detail=True, methods=['post', 'delete'],
+    @action(detail=True, methods=['post', 'patch', 'delete'],
             permission_classes=[IsAuthenticated, ])
     def shopping_cart(self, request, pk):
         serializer = ShoppingCartSerializer
         model = ShoppingCart
+        if request.method == 'PATCH':
+            cart = get_object_or_404(model, user=request.user, recipe_id=pk)
+            update_serializer = serializer(
+                cart,
+                data=request.data,
+                partial=True,
+                context={'request': request}
+            )
+            update_serializer.is_valid(raise_exception=True)
+            update_serializer.save()
+            return Response(update_serializer.data)
         return self.add_delete_recipe(serializer, pk, request, model)
 
+    @action(detail=False, methods=['post', 'delete'],
+            url_path='favorite/bulk', permission_classes=[IsAuthenticated])
+    def favorite_bulk(self, request):
+        return self.bulk_add_delete_recipes(request, Favorite)
+
+    @action(detail=False, methods=['delete'], url_path='favorite',
+            permission_classes=[IsAuthenticated])
+    def clear_favorites(self, request):
+        return self.clear_recipes(request, Favorite)
+
+    @action(detail=False, methods=['post', 'delete'],
+            url_path='shopping_cart/bulk',
+            permission_classes=[IsAuthenticated])
+    def shopping_cart_bulk(self, request):
+        return self.bulk_add_delete_recipes(request, ShoppingCart)
+
+    @action(detail=False, methods=['delete'], url_path='shopping_cart',
+            permission_classes=[IsAuthenticated])
+    def clear_shopping_cart(self, request):
+        return self.clear_recipes(request, ShoppingCart)
+
+    def perform_content_negotiation(self, request, force=False):
+        if self.action == 'download_shopping_cart':
+            force = True
+        return super().perform_content_negotiation(request, force)
+
     @action(
         detail=False,
         methods=('GET',),
         permission_classes=[IsAuthenticated]
     )
     def download_shopping_cart(self, request):
-        user = request.user
+        exporter = EXPORTERS.get(request.query_params.get('format', 'txt'))
+        if exporter is None:
+            return Response(
+                'Неподдерживаемый формат списка покупок',
+                status=status.HTTP_400_BAD_REQUEST
+            )
         ingredients = (
-            IngredientsInRecipe.objects
-            .filter(recipe__shopping_cart__user=user)
-            .values('ingredient__name', 'ingredient__measurement_unit',)
-            .annotate(total_amount=Sum('amount'))
-            .order_by('ingredient__name')
+            ShoppingCartItem.objects
+            .filter(user=request.user)
+            .shopping_list()
         )
-        return self.print_shopping_list_txt_file(ingredients)
-
-    def print_shopping_list_txt_file(self, ingredients):
-        shopping_list = ['Список покупок\n\n']
-        for ingredient in ingredients:
-            amount = ingredient['total_amount']
-            name = ingredient['ingredient__name']
-            measurement_unit = ingredient['ingredient__measurement_unit']
-            shopping_list.append(
-                f'{name} - {amount} {measurement_unit}.\n'
-            )
+        return exporter(ingredients).get_response()
 
-        return HttpResponse(
-            shopping_list,
-            {
-                "Content-Type": "text/plain",
-                "Content-Disposition": "attachment; filename='shop_list.txt'",
-            },
-        )
+
+class CacheMetricsView(APIView):
+    permission_classes = (IsAdminUser, )
+
+    def get(self, request):
+        return Response(get_cache_metrics(
+            (IngredientViewSet.cache_namespace, TagViewSet.cache_namespace,
+             RecipeViewSet.cache_namespace)
+        ))
+
+
+class RequestMetricsView(APIView):
+    permission_classes = (IsAdminUser, )
+    renderer_classes = (FastJSONRenderer, PrometheusRenderer)
+
+    def get(self, request):
+        return Response(endpoint_registry.snapshot())
+
+    def delete(self, request):
+        endpoint_registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
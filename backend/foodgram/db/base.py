@@ -0,0 +1,140 @@
+import threading
+from time import monotonic
+
+import psycopg2.extras
+from django.db.backends.postgresql import base
+from django.utils.asyncio import async_unsafe
+from psycopg2 import extensions, pool
+
+POOL_TIMEOUT = 30
+POOL_CHECK_IDLE_AFTER = 30
+
+
+class BlockingConnectionPool(pool.ThreadedConnectionPool):
+    def __init__(self, minconn, maxconn, *args, timeout=POOL_TIMEOUT,
+                 **kwargs):
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._idle_since = {}
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        for connection in self._pool:
+            self._idle_since[connection] = monotonic()
+
+    def getconn(self, key=None):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise pool.PoolError(
+                f'connection pool exhausted for {self.timeout} seconds'
+            )
+        try:
+            return super().getconn(key)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            if close or conn.closed:
+                self._idle_since.pop(conn, None)
+            else:
+                self._idle_since[conn] = monotonic()
+            self._slots.release()
+
+    def idle_time(self, connection):
+        idle_since = self._idle_since.get(connection)
+        return 0 if idle_since is None else monotonic() - idle_since
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+
+    @property
+    def pool_size(self):
+        return (self.settings_dict.get('POOL') or {}).get('MAX_SIZE', 0)
+
+    def get_pool(self, conn_params):
+        with self._pools_lock:
+            connection_pool = self._pools.get(self.alias)
+            if connection_pool is None:
+                options = self.settings_dict['POOL']
+                connection_pool = self._pools[self.alias] = (
+                    BlockingConnectionPool(
+                        options.get('MIN_SIZE', 1),
+                        self.pool_size,
+                        timeout=options.get('TIMEOUT', POOL_TIMEOUT),
+                        **conn_params,
+                    )
+                )
+            return connection_pool
+
+    def is_alive(self, connection, idle_time):
+        if connection.closed:
+            return False
+        if not self.settings_dict.get('CONN_HEALTH_CHECKS'):
+            return True
+        if idle_time < self.settings_dict['POOL'].get(
+                'CHECK_IDLE_AFTER', POOL_CHECK_IDLE_AFTER):
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except psycopg2.Error:
+            return False
+        return True
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        if not self.pool_size:
+            return super().get_new_connection(conn_params)
+        connection_pool = self.get_pool(conn_params)
+        connection = connection_pool.getconn()
+        while not self.is_alive(
+                connection, connection_pool.idle_time(connection)):
+            connection_pool.putconn(connection, close=True)
+            connection = connection_pool.getconn()
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        psycopg2.extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None or not self.pool_size:
+            return super()._close()
+        connection_pool = self._pools[self.alias]
+        status = self.connection.get_transaction_status()
+        if self.connection.closed or (
+                status == extensions.TRANSACTION_STATUS_UNKNOWN):
+            return connection_pool.putconn(self.connection, close=True)
+        with self.wrap_database_errors:
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                self.connection.rollback()
+            return connection_pool.putconn(self.connection)
+
+    def close_if_unusable_or_obsolete(self):
+        self.health_check_done = False
+        super().close_if_unusable_or_obsolete()
+
+    @async_unsafe
+    def ensure_connection(self):
+        if (self.connection is not None
+                and self.settings_dict.get('CONN_HEALTH_CHECKS')
+                and not self.health_check_done
+                and not self.in_atomic_block):
+            if not self.is_usable():
+                self.close()
+            self.health_check_done = True
+        super().ensure_connection()
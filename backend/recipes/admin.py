@@ -2,7 +2,9 @@ from django.contrib.admin import register, ModelAdmin
 from import_export import resources
 from import_export.admin import ImportExportModelAdmin
 
-from .models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from .models import (Favorite, Ingredient, Recipe, ShoppingCart,
+                     ShoppingCartItem, Tag, UnitConversion)
+from .search import update_search_vectors
 
 
 class IngredientResource(resources.ModelResource):
@@ -19,14 +21,32 @@ class IngredientAdmin(ImportExportModelAdmin, ModelAdmin):
     list_filter = ('name',)
 
 
+@register(UnitConversion)
+class UnitConversionAdmin(ModelAdmin):
+    list_display = ('unit', 'base_unit', 'factor')
+    search_fields = ('unit', 'base_unit')
+
+
 @register(Recipe)
 class RecipeAdmin(ModelAdmin):
-    list_display = ('id', 'name', 'author', 'text')
+    list_display = (
+        'id', 'name', 'author', 'text', 'favorites_count', 'in_carts_count'
+    )
     list_filter = ('author', 'name', 'tags')
+    list_select_related = ('author', )
+    readonly_fields = ('favorites_count', 'in_carts_count')
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            return super().save_model(request, obj, form, change)
+        concrete_fields = {field.name for field in obj._meta.concrete_fields}
+        obj.save(update_fields=[
+            name for name in form.changed_data if name in concrete_fields
+        ])
 
-    @staticmethod
-    def favorites(obj):
-        return obj.favorites.count()
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        update_search_vectors(Recipe.objects.filter(pk=form.instance.pk))
 
 
 @register(Tag)
@@ -43,3 +63,9 @@ class FavoriteAdmin(ModelAdmin):
 @register(ShoppingCart)
 class ShoppingCartAdmin(ModelAdmin):
     list_display = ('user', 'recipe')
+
+
+@register(ShoppingCartItem)
+class ShoppingCartItemAdmin(ModelAdmin):
+    list_display = ('user', 'ingredient', 'total_amount')
+    list_select_related = ('user', 'ingredient')
@@ -0,0 +1,96 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+from .models import Recipe
+
+RENDITIONS = {
+    'image_thumbnail': (320, 320),
+    'image_medium': (960, 960),
+}
+RENDITION_QUALITY = 80
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_WORKERS,
+            thread_name_prefix='recipe-images',
+        )
+    return _executor
+
+
+def render(image, size):
+    rendition = image.copy()
+    rendition.thumbnail(size)
+    if rendition.mode not in ('RGB', 'RGBA'):
+        rendition = rendition.convert('RGBA')
+    buffer = BytesIO()
+    rendition.save(buffer, 'WEBP', quality=RENDITION_QUALITY)
+    return ContentFile(buffer.getvalue())
+
+
+def generate_renditions(recipe_id):
+    recipe = Recipe.objects.filter(pk=recipe_id).first()
+    if recipe is None or not recipe.image:
+        return
+    source = recipe.image.name
+    with recipe.image.open('rb') as file:
+        image = ImageOps.exif_transpose(Image.open(file))
+        image.load()
+    stem = Path(source).stem
+    for field, size in RENDITIONS.items():
+        getattr(recipe, field).save(
+            f'{stem}_{field}.webp', render(image, size), save=False
+        )
+    if Recipe.objects.filter(pk=recipe_id, image=source).exists():
+        recipe.save(update_fields=list(RENDITIONS))
+
+
+def generate_renditions_in_worker(recipe_id):
+    try:
+        generate_renditions(recipe_id)
+    except Exception:
+        logger.exception(
+            'Не удалось обработать картинку рецепта %s', recipe_id
+        )
+    finally:
+        connections.close_all()
+
+
+def render_after_commit(recipe_id, stale_files):
+    for storage, name in stale_files:
+        storage.delete(name)
+    if not settings.IMAGE_WORKERS:
+        generate_renditions(recipe_id)
+        return
+    get_executor().submit(generate_renditions_in_worker, recipe_id)
+
+
+def schedule_renditions(recipe):
+    stale_files = [
+        (file.storage, file.name)
+        for file in (getattr(recipe, field) for field in RENDITIONS)
+        if file
+    ]
+    for field in RENDITIONS:
+        setattr(recipe, field, '')
+    if recipe.pk is not None:
+        Recipe.objects.filter(pk=recipe.pk).update(
+            **dict.fromkeys(RENDITIONS, '')
+        )
+    recipe_id = recipe.pk
+    transaction.on_commit(
+        lambda: render_after_commit(recipe_id, stale_files)
+    )
@@ -0,0 +1,60 @@
+from bisect import bisect_left
+from operator import itemgetter
+from threading import Lock
+from time import monotonic
+
+from .models import Ingredient
+
+SEARCH_LIMIT = 50
+INDEX_TTL = 300
+
+
+class IngredientIndex:
+    def __init__(self):
+        self._lock = Lock()
+        self._index = None
+
+    def invalidate(self):
+        self._index = None
+
+    def build(self):
+        rows = sorted((
+            (name.casefold(), {
+                'id': pk, 'name': name, 'measurement_unit': measurement_unit
+            })
+            for pk, name, measurement_unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit'
+            )
+        ), key=itemgetter(0))
+        keys = [key for key, _ in rows]
+        entries = [entry for _, entry in rows]
+        return keys, entries, monotonic() + INDEX_TTL
+
+    def get_index(self):
+        index = self._index
+        if index is None or index[2] < monotonic():
+            with self._lock:
+                index = self._index
+                if index is None or index[2] < monotonic():
+                    index = self._index = self.build()
+        return index
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        query = query.casefold()
+        keys, entries, _ = self.get_index()
+        result = []
+        position = bisect_left(keys, query)
+        while (position < len(keys) and len(result) < limit
+               and keys[position].startswith(query)):
+            result.append(entries[position])
+            position += 1
+        if len(result) < limit:
+            for key, entry in zip(keys, entries):
+                if query in key and not key.startswith(query):
+                    result.append(entry)
+                    if len(result) == limit:
+                        break
+        return result
+
+
+ingredient_index = IngredientIndex()
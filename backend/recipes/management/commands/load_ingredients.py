@@ -0,0 +1,137 @@
+import csv
+import io
+import json
+from itertools import islice
+from pathlib import Path
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from recipes.models import Ingredient
+
+DEFAULT_FILE = settings.DATA_DIR / 'ingredients.csv'
+
+
+def read_csv(path):
+    with open(path, encoding='utf-8', newline='') as file:
+        for row in csv.reader(file):
+            if len(row) >= 2:
+                yield row[0], row[1]
+
+
+def read_json(path):
+    with open(path, encoding='utf-8') as file:
+        for item in json.load(file):
+            yield item['name'], item['measurement_unit']
+
+
+READERS = {
+    '.csv': read_csv,
+    '.json': read_json,
+}
+
+
+class Command(BaseCommand):
+    help = 'Загружает ингредиенты из CSV/JSON файлов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'files',
+            nargs='*',
+            default=[DEFAULT_FILE],
+            help='Файлы с ингредиентами (.csv или .json)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Размер пачки для вставки',
+        )
+        parser.add_argument(
+            '--no-copy',
+            action='store_true',
+            help='Не использовать COPY даже на PostgreSQL',
+        )
+
+    def read_rows(self, files):
+        seen = set()
+        name_length = Ingredient._meta.get_field('name').max_length
+        unit_length = Ingredient._meta.get_field(
+            'measurement_unit'
+        ).max_length
+        for path in map(Path, files):
+            reader = READERS.get(path.suffix.lower())
+            if reader is None:
+                raise CommandError(f'Неподдерживаемый формат файла: {path}')
+            if not path.exists():
+                raise CommandError(f'Файл не найден: {path}')
+            for name, measurement_unit in reader(path):
+                self.processed += 1
+                row = (name.strip(), measurement_unit.strip())
+                if (not all(row) or len(row[0]) > name_length
+                        or len(row[1]) > unit_length):
+                    self.skipped += 1
+                elif row not in seen:
+                    seen.add(row)
+                    yield row
+
+    def batches(self, rows, batch_size):
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def load_with_orm(self, rows, batch_size):
+        for batch in self.batches(rows, batch_size):
+            Ingredient.objects.bulk_create(
+                [
+                    Ingredient(name=name, measurement_unit=measurement_unit)
+                    for name, measurement_unit in batch
+                ],
+                ignore_conflicts=True,
+            )
+
+    def load_with_copy(self, rows, batch_size):
+        table = Ingredient._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMPORARY TABLE ingredient_staging '
+                '(name text, measurement_unit text) ON COMMIT DROP'
+            )
+            for batch in self.batches(rows, batch_size):
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(batch)
+                buffer.seek(0)
+                cursor.copy_expert(
+                    'COPY ingredient_staging (name, measurement_unit) '
+                    'FROM STDIN WITH (FORMAT csv)',
+                    buffer,
+                )
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                'SELECT name, measurement_unit FROM ingredient_staging '
+                'ON CONFLICT (name, measurement_unit) DO NOTHING'
+            )
+
+    def handle(self, *args, **options):
+        started = perf_counter()
+        self.processed = self.skipped = 0
+        before = Ingredient.objects.count()
+        rows = self.read_rows(options['files'])
+        with transaction.atomic():
+            if connection.vendor == 'postgresql' and not options['no_copy']:
+                self.load_with_copy(rows, options['batch_size'])
+            else:
+                self.load_with_orm(rows, options['batch_size'])
+        total = Ingredient.objects.count()
+        elapsed = perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Прочитано строк: {self.processed}, '
+            f'пропущено: {self.skipped}, '
+            f'добавлено ингредиентов: {total - before}, всего: {total}. '
+            f'Время: {elapsed:.2f} с, '
+            f'{self.processed / elapsed if elapsed else 0:.0f} строк/с'
+        ))
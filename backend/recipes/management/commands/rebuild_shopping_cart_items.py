@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.models import ShoppingCartItem
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает или проверяет агрегированные списки покупок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Только сверить сохраненные суммы с расчетными',
+        )
+
+    def handle(self, *args, **options):
+        if not options['verify']:
+            ShoppingCartItem.objects.rebuild()
+            self.stdout.write(self.style.SUCCESS(
+                'Списки покупок пересчитаны: '
+                f'{ShoppingCartItem.objects.count()} позиций'
+            ))
+            return
+        expected = {
+            (item['user_id'], item['ingredient_id']): item['total_amount']
+            for item in ShoppingCartItem.objects.calculate()
+        }
+        stored = {
+            (user_id, ingredient_id): total_amount
+            for user_id, ingredient_id, total_amount
+            in ShoppingCartItem.objects.values_list(
+                'user_id', 'ingredient_id', 'total_amount'
+            )
+        }
+        mismatches = [
+            key for key in expected.keys() | stored.keys()
+            if expected.get(key) != stored.get(key)
+        ]
+        if mismatches:
+            raise CommandError(
+                f'Найдено расхождений: {len(mismatches)}. '
+                'Запустите команду без --verify для пересчета'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Списки покупок совпадают: {len(stored)} позиций'
+        ))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает или проверяет счетчики избранного и списков покупок '
+        'у рецептов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Только сверить сохраненные счетчики с расчетными',
+        )
+
+    def handle(self, *args, **options):
+        if not options['verify']:
+            updated = Recipe.objects.reconcile_counters()
+            self.stdout.write(self.style.SUCCESS(
+                f'Счетчики рецептов пересчитаны, исправлено: {updated}'
+            ))
+            return
+        counters = Recipe.objects.counter_expressions()
+        mismatches = Recipe.objects.exclude(**counters).count()
+        if mismatches:
+            raise CommandError(
+                f'Найдено расхождений: {mismatches}. '
+                'Запустите команду без --verify для пересчета'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Счетчики совпадают: {Recipe.objects.count()} рецептов'
+        ))
@@ -0,0 +1,41 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from recipes import similarity
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает таблицу похожих рецептов по ингредиентам '
+        'и совместному добавлению в избранное'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=similarity.TOP_K)
+        parser.add_argument(
+            '--batch-size', type=int, default=similarity.BATCH_SIZE,
+            help='Число рецептов в одном блоке умножения матриц',
+        )
+        parser.add_argument(
+            '--ingredient-weight', type=float,
+            default=similarity.INGREDIENT_WEIGHT,
+        )
+        parser.add_argument(
+            '--favorite-weight', type=float,
+            default=similarity.FAVORITE_WEIGHT,
+        )
+
+    def handle(self, *args, **options):
+        started = perf_counter()
+        created = similarity.refresh_similarities(
+            top_k=options['top_k'],
+            batch_size=options['batch_size'],
+            ingredient_weight=options['ingredient_weight'],
+            favorite_weight=options['favorite_weight'],
+        )
+        backend = 'NumPy/SciPy' if similarity.np is not None else 'Python'
+        self.stdout.write(self.style.SUCCESS(
+            f'Сохранено пар похожих рецептов: {created} ({backend}). '
+            f'Время: {perf_counter() - started:.2f} с.'
+        ))
@@ -0,0 +1,72 @@
+# Generated by Django 3.2 on 2026-10-18 04:22
+
+from django.db import migrations, models
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientsInRecipe = apps.get_model('recipes', 'IngredientsInRecipe')
+    ShoppingCartItem = apps.get_model('recipes', 'ShoppingCartItem')
+    duplicates = (
+        Ingredient.objects
+        .values('name', 'measurement_unit')
+        .annotate(keep_id=models.Min('id'), total=models.Count('id'))
+        .filter(total__gt=1)
+        .order_by()
+    )
+    merged = False
+    for group in duplicates:
+        extra_ids = list(Ingredient.objects.filter(
+            name=group['name'], measurement_unit=group['measurement_unit']
+        ).exclude(id=group['keep_id']).values_list('id', flat=True))
+        kept = {
+            item.recipe_id: item
+            for item in IngredientsInRecipe.objects.filter(
+                ingredient_id=group['keep_id']
+            )
+        }
+        for item in IngredientsInRecipe.objects.filter(
+            ingredient_id__in=extra_ids
+        ).order_by('id'):
+            target = kept.get(item.recipe_id)
+            if target is None:
+                item.ingredient_id = group['keep_id']
+                item.save(update_fields=['ingredient'])
+                kept[item.recipe_id] = item
+            else:
+                target.amount += item.amount
+                target.save(update_fields=['amount'])
+                item.delete()
+        Ingredient.objects.filter(id__in=extra_ids).delete()
+        merged = True
+    if not merged:
+        return
+    ShoppingCartItem.objects.all().delete()
+    items = (
+        IngredientsInRecipe.objects
+        .annotate(user_id=models.F('recipe__shopping_cart__user'))
+        .filter(user_id__isnull=False)
+        .values('user_id', 'ingredient_id')
+        .annotate(total_amount=models.Sum('amount'))
+        .order_by()
+    )
+    ShoppingCartItem.objects.bulk_create(
+        (ShoppingCartItem(**item) for item in items), batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_shoppingcartitem'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2 on 2026-10-18 04:49
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_recipesimilarity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='servings',
+            field=models.PositiveSmallIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1, 'Количество порций должно быть не меньше 1'), django.core.validators.MaxValueValidator(32767, 'Количество порций слишком большое')], verbose_name='Количество порций'),
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='servings',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='Пусто - как в рецепте', null=True, validators=[django.core.validators.MinValueValidator(1, 'Количество порций должно быть не меньше 1'), django.core.validators.MaxValueValidator(32767, 'Количество порций слишком большое')], verbose_name='Количество порций'),
+        ),
+        migrations.AlterField(
+            model_name='shoppingcartitem',
+            name='total_amount',
+            field=models.FloatField(verbose_name='Общее количество'),
+        ),
+    ]
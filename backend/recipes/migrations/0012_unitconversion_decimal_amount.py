@@ -0,0 +1,53 @@
+# Generated by Django 3.2 on 2026-10-18 05:27
+
+from decimal import Decimal
+import django.core.validators
+from django.db import migrations, models
+
+UNIT_CONVERSIONS = (
+    ('кг', 'г', 1000),
+    ('л', 'мл', 1000),
+    ('стакан', 'мл', 200),
+    ('ст. л.', 'мл', 15),
+    ('ч. л.', 'мл', 5),
+)
+
+
+def create_unit_conversions(apps, schema_editor):
+    UnitConversion = apps.get_model('recipes', 'UnitConversion')
+    UnitConversion.objects.bulk_create(
+        UnitConversion(unit=unit, base_unit=base_unit, factor=factor)
+        for unit, base_unit, factor in UNIT_CONVERSIONS
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_favorite_related_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnitConversion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unit', models.CharField(help_text='Обязательное поле', max_length=15, unique=True, verbose_name='Единица измерения')),
+                ('base_unit', models.CharField(help_text='Обязательное поле', max_length=15, verbose_name='Базовая единица')),
+                ('factor', models.DecimalField(decimal_places=6, help_text='Сколько базовых единиц в одной единице', max_digits=12, validators=[django.core.validators.MinValueValidator(Decimal('0.000001'), 'Множитель должен быть больше нуля')], verbose_name='Множитель')),
+            ],
+            options={
+                'verbose_name': 'Перевод единиц',
+                'verbose_name_plural': 'Переводы единиц',
+                'ordering': ('unit',),
+            },
+        ),
+        migrations.AlterField(
+            model_name='shoppingcartitem',
+            name='total_amount',
+            field=models.DecimalField(decimal_places=3, max_digits=12, verbose_name='Общее количество'),
+        ),
+        migrations.RunPython(
+            create_unit_conversions, migrations.RunPython.noop
+        ),
+    ]
@@ -1,12 +1,45 @@
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.core.cache import cache
+from django.db import IntegrityError, connections, models, transaction
+from django.db.models import (Case, Count, Exists, F, Func, OuterRef,
+                              Prefetch, Subquery, Value, When)
+from django.db.models.functions import Cast, Coalesce
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.dispatch import Signal
+
+from users.models import Subscriptions
 
 
 User = get_user_model()
 
 MAX_POSITIVE_VALUE = 32767
 MIN_VALUE = 1
+TAG_SLUGS_CACHE_KEY = 'recipes:tag_slugs'
+TAG_SLUGS_CACHE_TIMEOUT = 60 * 60
+COUNTER_FIELDS = ('favorites_count', 'in_carts_count')
+AMOUNT_MAX_DIGITS = 12
+AMOUNT_DECIMAL_PLACES = 3
+AMOUNT_QUANTUM = Decimal(1).scaleb(-AMOUNT_DECIMAL_PLACES)
+
+user_recipes_changed = Signal()
+recipe_ingredients_changed = Signal()
+
+
+class TagQuerySet(models.QuerySet):
+    def slug_ids(self):
+        if settings.CACHES['default']['BACKEND'] in (
+                settings.PROCESS_LOCAL_CACHES):
+            return dict(self.values_list('slug', 'id'))
+        slugs = cache.get(TAG_SLUGS_CACHE_KEY)
+        if slugs is None:
+            slugs = dict(self.values_list('slug', 'id'))
+            cache.set(TAG_SLUGS_CACHE_KEY, slugs, TAG_SLUGS_CACHE_TIMEOUT)
+        return slugs
 
 
 class Tag(models.Model):
@@ -27,6 +60,8 @@ class Tag(models.Model):
         unique=True,
     )
 
+    objects = TagQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Тег'
         verbose_name_plural = 'Теги'
@@ -52,11 +87,130 @@ class Ingredient(models.Model):
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
         ordering = ('name',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'],
+                name='unique_ingredient'
+            )
+        ]
 
     def __str__(self):
         return self.name
 
 
+class UnitConversion(models.Model):
+    unit = models.CharField(
+        max_length=15,
+        unique=True,
+        verbose_name='Единица измерения',
+        help_text='Обязательное поле',
+    )
+    base_unit = models.CharField(
+        max_length=15,
+        verbose_name='Базовая единица',
+        help_text='Обязательное поле',
+    )
+    factor = models.DecimalField(
+        max_digits=12,
+        decimal_places=6,
+        verbose_name='Множитель',
+        help_text='Сколько базовых единиц в одной единице',
+        validators=[MinValueValidator(
+            Decimal('0.000001'), 'Множитель должен быть больше нуля'
+        )],
+    )
+
+    class Meta:
+        verbose_name = 'Перевод единиц'
+        verbose_name_plural = 'Переводы единиц'
+        ordering = ('unit',)
+
+    def __str__(self):
+        return f'1 {self.unit} = {self.factor.normalize():f} {self.base_unit}'
+
+
+class RecipeQuerySet(models.QuerySet):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ranking = None
+
+    def _clone(self):
+        clone = super()._clone()
+        clone.ranking = self.ranking
+        return clone
+
+    def ranked(self, recipe_ids):
+        if self.ranking is not None:
+            previous = set(self.ranking)
+            recipe_ids = [pk for pk in recipe_ids if pk in previous]
+        queryset = self.filter(pk__in=recipe_ids)
+        queryset.ranking = list(recipe_ids)
+        return queryset
+
+    def with_related(self):
+        return self.prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredients_list',
+                queryset=IngredientsInRecipe.objects.select_related(
+                    'ingredient'
+                ),
+            ),
+        )
+
+    def with_user_flags(self, user):
+        if not user.is_authenticated:
+            return self.select_related('author').annotate(
+                is_favorited=Value(False, output_field=models.BooleanField()),
+                is_in_shopping_cart=Value(
+                    False, output_field=models.BooleanField()
+                ),
+            )
+        authors = User.objects.annotate(
+            is_subscribed=Exists(Subscriptions.objects.filter(
+                user=user, author=OuterRef('pk')
+            ))
+        )
+        return self.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+        ).prefetch_related(Prefetch('author', queryset=authors))
+
+    def change_counter(self, field, delta):
+        return self.update(**{field: F(field) + delta})
+
+    def popular(self):
+        return self.order_by(
+            '-favorites_count', '-in_carts_count', '-pub_date', '-id'
+        )
+
+    def counter_expressions(self):
+        return {
+            field: Coalesce(Subquery(
+                model.objects
+                .filter(recipe=OuterRef('pk'))
+                .order_by()
+                .values('recipe')
+                .annotate(total=Count('pk'))
+                .values('total')
+            ), 0)
+            for field, model in zip(COUNTER_FIELDS, (Favorite, ShoppingCart))
+        }
+
+    def reconcile_counters(self):
+        counters = self.counter_expressions()
+        return self.exclude(**counters).update(**counters)
+
+    def for_read(self, user):
+        return self.defer('search_vector').with_related().with_user_flags(
+            user
+        )
+
+
 class Recipe(models.Model):
     name = models.CharField(
         max_length=200,
@@ -78,6 +232,16 @@ class Recipe(models.Model):
         help_text='Обязательное поле',
         upload_to='images/',
     )
+    image_thumbnail = models.ImageField(
+        verbose_name='Миниатюра',
+        upload_to='images/renditions/',
+        blank=True,
+    )
+    image_medium = models.ImageField(
+        verbose_name='Картинка для ленты',
+        upload_to='images/renditions/',
+        blank=True,
+    )
     tags = models.ManyToManyField(
         Tag,
         related_name='recipes',
@@ -91,6 +255,21 @@ class Recipe(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True,
     )
+    search_vector = SearchVectorField(
+        verbose_name='Поисковый вектор',
+        null=True,
+        editable=False,
+    )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='В избранном',
+        default=0,
+        editable=False,
+    )
+    in_carts_count = models.PositiveIntegerField(
+        verbose_name='В списках покупок',
+        default=0,
+        editable=False,
+    )
     cooking_time = models.PositiveSmallIntegerField(
         verbose_name='Время приготовления',
         default=1,
@@ -103,11 +282,36 @@ class Recipe(models.Model):
             )
         ]
     )
+    servings = models.PositiveSmallIntegerField(
+        verbose_name='Количество порций',
+        default=1,
+        validators=[
+            MinValueValidator(
+                MIN_VALUE, 'Количество порций должно быть не меньше 1'
+            ),
+            MaxValueValidator(
+                MAX_POSITIVE_VALUE, 'Количество порций слишком большое'
+            )
+        ]
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(fields=['-pub_date'], name='recipe_pub_date_idx'),
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='recipe_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['-favorites_count', '-in_carts_count', '-pub_date'],
+                name='recipe_popular_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'Рецепт: {self.name}. Автор: {self.author.username}'
@@ -145,6 +349,70 @@ class IngredientsInRecipe(models.Model):
         ]
 
 
+class UserRecipeQuerySet(models.QuerySet):
+    def insert(self, objs):
+        try:
+            with transaction.atomic():
+                self.bulk_create(objs)
+        except IntegrityError:
+            return False
+        return True
+
+    def bulk_add(self, user, recipe_ids):
+        existing = set(self.filter(
+            user=user, recipe_id__in=recipe_ids
+        ).values_list('recipe_id', flat=True))
+        objs = [
+            self.model(user=user, recipe_id=recipe_id)
+            for recipe_id in dict.fromkeys(recipe_ids)
+            if recipe_id not in existing
+        ]
+        with transaction.atomic():
+            if self.insert(objs):
+                added = objs
+            else:
+                added = [obj for obj in objs if self.insert([obj])]
+            if added:
+                user_recipes_changed.send(
+                    sender=self.model, user_id=user.pk,
+                    instances=added, delta=1,
+                )
+        return [obj.recipe_id for obj in added]
+
+    def delete_returning(self):
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        opts = self.model._meta
+        fields = opts.concrete_fields
+        sql, params = self.order_by().values('pk').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {quote(opts.db_table)} '
+                f'WHERE {quote(opts.pk.column)} IN ({sql}) RETURNING '
+                + ', '.join(quote(field.column) for field in fields),
+                params,
+            )
+            return [
+                self.model.from_db(
+                    self.db, [field.attname for field in fields], row
+                )
+                for row in cursor.fetchall()
+            ]
+
+    def bulk_remove(self, user, recipe_ids=None):
+        queryset = self.filter(user=user)
+        if recipe_ids is not None:
+            queryset = queryset.filter(recipe_id__in=recipe_ids)
+        with transaction.atomic(using=self.db):
+            removed = queryset.delete_returning()
+            if removed:
+                user_recipes_changed.send(
+                    sender=self.model, user_id=user.pk,
+                    instances=removed, delta=-1,
+                )
+        return [obj.recipe_id for obj in removed]
+
+
 class Favorite(models.Model):
     user = models.ForeignKey(
         User,
@@ -155,6 +423,8 @@ class Favorite(models.Model):
         on_delete=models.CASCADE,
     )
 
+    objects = UserRecipeQuerySet.as_manager()
+
     class Meta:
         ordering = ('user', )
         verbose_name = 'Избранное'
@@ -178,6 +448,22 @@ class ShoppingCart(models.Model):
         on_delete=models.CASCADE,
         related_name='shopping_cart'
     )
+    servings = models.PositiveSmallIntegerField(
+        verbose_name='Количество порций',
+        null=True,
+        blank=True,
+        help_text='Пусто - как в рецепте',
+        validators=[
+            MinValueValidator(
+                MIN_VALUE, 'Количество порций должно быть не меньше 1'
+            ),
+            MaxValueValidator(
+                MAX_POSITIVE_VALUE, 'Количество порций слишком большое'
+            )
+        ]
+    )
+
+    objects = UserRecipeQuerySet.as_manager()
 
     class Meta:
         ordering = ('user', )
@@ -188,3 +474,220 @@ class ShoppingCart(models.Model):
                 name='unique_shopping_cart'
             )
         ]
+
+
+def amount_field():
+    return models.DecimalField(
+        max_digits=AMOUNT_MAX_DIGITS, decimal_places=AMOUNT_DECIMAL_PLACES
+    )
+
+
+def round_amount(expression):
+    return Func(
+        Cast(expression, amount_field()), Value(AMOUNT_DECIMAL_PLACES),
+        function='ROUND', output_field=amount_field(),
+    )
+
+
+def scale_amount(amount, servings, recipe_servings):
+    return (
+        Decimal(amount * servings) / recipe_servings
+    ).quantize(AMOUNT_QUANTUM, ROUND_HALF_UP)
+
+
+def scaled_amount(servings=F('recipe__shopping_cart__servings')):
+    recipe_servings = Cast('recipe__servings', models.FloatField())
+    return round_amount(F('amount') * Coalesce(
+        servings, 'recipe__servings'
+    ) / recipe_servings)
+
+
+def unit_conversion(field):
+    return UnitConversion.objects.filter(unit=OuterRef(
+        'ingredient__measurement_unit'
+    )).values(field)[:1]
+
+
+class ShoppingCartItemQuerySet(models.QuerySet):
+    def apply_amounts(self, user_ids, amounts):
+        amounts = {
+            ingredient_id: amount
+            for ingredient_id, amount in amounts.items()
+            if amount
+        }
+        if not user_ids or not amounts:
+            return
+        with transaction.atomic():
+            self.bulk_create(
+                [
+                    ShoppingCartItem(
+                        user_id=user_id,
+                        ingredient_id=ingredient_id,
+                        total_amount=0,
+                    )
+                    for user_id in user_ids
+                    for ingredient_id, amount in amounts.items()
+                    if amount > 0
+                ],
+                ignore_conflicts=True,
+            )
+            self.filter(
+                user_id__in=user_ids, ingredient_id__in=amounts
+            ).update(total_amount=round_amount(F('total_amount') + Case(
+                *[
+                    When(ingredient_id=ingredient_id, then=Value(amount))
+                    for ingredient_id, amount in amounts.items()
+                ],
+                default=Value(Decimal(0)),
+                output_field=amount_field(),
+            )))
+            self.filter(
+                user_id__in=user_ids, total_amount__lte=0
+            ).delete()
+
+    def add_recipes(self, user_id, servings, sign=1):
+        recipes_by_servings = defaultdict(list)
+        for recipe_id, cart_servings in servings.items():
+            recipes_by_servings[cart_servings].append(recipe_id)
+        amounts = defaultdict(Decimal)
+        for cart_servings, recipe_ids in recipes_by_servings.items():
+            for ingredient_id, amount in (
+                IngredientsInRecipe.objects
+                .filter(recipe_id__in=recipe_ids)
+                .values('ingredient_id')
+                .annotate(total=models.Sum(scaled_amount(Value(
+                    cart_servings, output_field=models.IntegerField()
+                ))))
+                .values_list('ingredient_id', 'total')
+                .order_by()
+            ):
+                amounts[ingredient_id] += sign * amount
+        self.apply_amounts([user_id], amounts)
+
+    def add_recipe(self, user_id, recipe_id, servings=None, sign=1):
+        self.add_recipes(user_id, {recipe_id: servings}, sign)
+
+    def remove_recipe(self, user_id, recipe_id, servings=None):
+        self.add_recipe(user_id, recipe_id, servings, sign=-1)
+
+    def change_recipe(self, recipe, old_amounts, new_amounts):
+        users_by_servings = defaultdict(list)
+        for user_id, servings in ShoppingCart.objects.filter(
+            recipe=recipe
+        ).values_list('user_id', 'servings'):
+            users_by_servings[servings or recipe.servings].append(user_id)
+        for servings, user_ids in users_by_servings.items():
+            self.apply_amounts(user_ids, {
+                ingredient_id: (
+                    scale_amount(new_amounts.get(ingredient_id, 0),
+                                 servings, recipe.servings)
+                    - scale_amount(old_amounts.get(ingredient_id, 0),
+                                   servings, recipe.servings)
+                )
+                for ingredient_id in old_amounts.keys() | new_amounts.keys()
+            })
+
+    def change_servings(self, recipe):
+        user_ids = list(ShoppingCart.objects.filter(
+            recipe=recipe, servings__isnull=False
+        ).values_list('user_id', flat=True))
+        if user_ids:
+            self.rebuild(user_ids)
+
+    def calculate(self):
+        return (
+            IngredientsInRecipe.objects
+            .annotate(user_id=F('recipe__shopping_cart__user'))
+            .filter(user_id__isnull=False)
+            .values('user_id', 'ingredient_id')
+            .annotate(total_amount=models.Sum(scaled_amount()))
+            .order_by()
+        )
+
+    def rebuild(self, user_ids=None):
+        items = self.calculate()
+        with transaction.atomic():
+            if user_ids is None:
+                self.all().delete()
+            else:
+                self.filter(user_id__in=user_ids).delete()
+                items = items.filter(user_id__in=user_ids)
+            self.bulk_create(
+                (ShoppingCartItem(**item) for item in items),
+                batch_size=1000,
+            )
+
+    def shopping_list(self):
+        return (
+            self.values(
+                name=F('ingredient__name'),
+                measurement_unit=Coalesce(
+                    Subquery(unit_conversion('base_unit')),
+                    'ingredient__measurement_unit',
+                ),
+            )
+            .annotate(amount=models.Sum(
+                F('total_amount') * Coalesce(
+                    Subquery(unit_conversion('factor')), Value(Decimal(1))
+                ),
+                output_field=amount_field(),
+            ))
+            .order_by('name', 'measurement_unit')
+        )
+
+
+class ShoppingCartItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+    )
+    total_amount = models.DecimalField(
+        max_digits=AMOUNT_MAX_DIGITS,
+        decimal_places=AMOUNT_DECIMAL_PLACES,
+        verbose_name='Общее количество',
+    )
+
+    objects = ShoppingCartItemQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('user', )
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Список покупок'
+        default_related_name = 'shopping_cart_items'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_cart_item'
+            )
+        ]
+
+
+class RecipeSimilarity(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similarities',
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_for',
+    )
+    score = models.FloatField(
+        verbose_name='Похожесть',
+    )
+
+    class Meta:
+        ordering = ('recipe', '-score')
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'similar'],
+                name='unique_recipe_similarity'
+            )
+        ]
@@ -0,0 +1,158 @@
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict, namedtuple
+from itertools import chain
+from threading import Lock
+from time import monotonic, time_ns
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import IngredientsInRecipe
+
+GENERATION_KEY = 'recipes:pantry:generation'
+CHANGES_KEY = 'recipes:pantry:changes:{}'
+CHANGES_TIMEOUT = 60 * 60
+MAX_PENDING_CHANGES = 100
+INDEX_TTL = 300
+
+PantrySnapshot = namedtuple(
+    'PantrySnapshot', ('postings', 'sizes', 'generation', 'expires')
+)
+
+
+def get_expiry():
+    if settings.CACHES['default']['BACKEND'] in settings.PROCESS_LOCAL_CACHES:
+        return monotonic() + INDEX_TTL
+    return float('inf')
+
+
+class PantryIndex:
+    def __init__(self):
+        self._lock = Lock()
+        self._index = None
+
+    def invalidate(self):
+        self._index = None
+
+    def get_generation(self):
+        generation = cache.get(GENERATION_KEY)
+        if generation is None:
+            cache.add(GENERATION_KEY, time_ns(), None)
+            generation = cache.get(GENERATION_KEY)
+        return generation
+
+    def mark_changed(self, recipe_ids=None):
+        try:
+            generation = cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.set(GENERATION_KEY, time_ns(), None)
+            return
+        if recipe_ids is not None:
+            cache.set(
+                CHANGES_KEY.format(generation), list(recipe_ids),
+                CHANGES_TIMEOUT,
+            )
+
+    def load(self, recipe_ids=None):
+        rows = IngredientsInRecipe.objects.order_by('recipe_id')
+        if recipe_ids is not None:
+            rows = rows.filter(recipe_id__in=recipe_ids)
+        return rows.values_list('recipe_id', 'ingredient_id').iterator()
+
+    def build(self, generation, rows=None):
+        postings = defaultdict(lambda: array('i'))
+        for recipe_id, ingredient_id in self.load() if rows is None else rows:
+            postings[ingredient_id].append(recipe_id)
+        last_id = max(
+            (recipe_ids[-1] for recipe_ids in postings.values()), default=0
+        )
+        sizes = array('H', bytes(2 * (last_id + 1)))
+        for recipe_id in chain.from_iterable(postings.values()):
+            sizes[recipe_id] += 1
+        return PantrySnapshot(dict(postings), sizes, generation, get_expiry())
+
+    def update(self, index, generation, recipe_ids, rows=None):
+        postings, sizes = dict(index.postings), array('H', index.sizes)
+        changed = sorted(set(recipe_ids))
+        copied = set()
+        for ingredient_id, posting in index.postings.items():
+            positions = []
+            for recipe_id in changed:
+                position = bisect_left(posting, recipe_id)
+                if position < len(posting) and posting[position] == recipe_id:
+                    positions.append(position)
+            if positions:
+                copied.add(ingredient_id)
+                posting = postings[ingredient_id] = array('i', posting)
+                for position in reversed(positions):
+                    del posting[position]
+        for recipe_id in changed:
+            if recipe_id < len(sizes):
+                sizes[recipe_id] = 0
+        for recipe_id, ingredient_id in (
+                self.load(changed) if rows is None else rows):
+            if ingredient_id not in copied:
+                copied.add(ingredient_id)
+                postings[ingredient_id] = array(
+                    'i', postings.get(ingredient_id, ())
+                )
+            insort(postings[ingredient_id], recipe_id)
+            if recipe_id >= len(sizes):
+                sizes.extend(bytes(2 * (recipe_id + 1 - len(sizes))))
+            sizes[recipe_id] += 1
+        return PantrySnapshot(
+            {key: value for key, value in postings.items() if value},
+            sizes, generation, index.expires,
+        )
+
+    def refresh(self, index, generation):
+        if (index is None or index.expires < monotonic()
+                or not 0 < generation - index.generation
+                <= MAX_PENDING_CHANGES):
+            return self.build(generation)
+        keys = [
+            CHANGES_KEY.format(pending)
+            for pending in range(index.generation + 1, generation + 1)
+        ]
+        changes = cache.get_many(keys)
+        if len(changes) != len(keys):
+            return self.build(generation)
+        return self.update(
+            index, generation, chain.from_iterable(changes.values())
+        )
+
+    def is_stale(self, index, generation):
+        return (index is None or index.generation != generation
+                or index.expires < monotonic())
+
+    def get_index(self):
+        generation = self.get_generation()
+        index = self._index
+        if self.is_stale(index, generation):
+            with self._lock:
+                index = self._index
+                if self.is_stale(index, generation):
+                    index = self._index = self.refresh(index, generation)
+        return index
+
+    def search(self, ingredient_ids, max_missing=0):
+        postings, sizes, _, _ = self.get_index()
+        hits = Counter(chain.from_iterable(
+            postings.get(ingredient_id, ())
+            for ingredient_id in set(ingredient_ids)
+        ))
+        matches = [
+            (hit / sizes[recipe_id], sizes[recipe_id] - hit, recipe_id)
+            for recipe_id, hit in hits.items()
+            if sizes[recipe_id] - hit <= max_missing
+        ]
+        matches.sort(key=lambda match: (-match[0], match[1], -match[2]))
+        return [recipe_id for _, _, recipe_id in matches]
+
+
+pantry_index = PantryIndex()
+
+
+def pantry_recipes(queryset, ingredient_ids, max_missing=0):
+    return queryset.ranked(pantry_index.search(ingredient_ids, max_missing))
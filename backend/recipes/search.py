@@ -0,0 +1,163 @@
+import re
+from collections import defaultdict
+from threading import Lock
+from time import monotonic
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector, TrigramSimilarity)
+from django.db import connections
+from django.db.models import F, OuterRef, Q, Subquery
+
+from .models import IngredientsInRecipe, Recipe
+
+SEARCH_CONFIG = 'russian'
+INDEX_TTL = 300
+TRIGRAM_THRESHOLD = 0.3
+PREFIX_WEIGHT = 0.8
+WEIGHTS = {
+    'name': 1.0,
+    'ingredients': 0.4,
+    'text': 0.2,
+}
+
+TOKEN_RE = re.compile(r'\w+')
+ENDING_RE = re.compile(r'[аеёиоуыэюяйь]+$')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.casefold())
+
+
+def stem(token):
+    stemmed = ENDING_RE.sub('', token)
+    return stemmed if len(stemmed) >= 3 else token
+
+
+def trigrams(word):
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(first, second):
+    first, second = trigrams(first), trigrams(second)
+    return len(first & second) / len(first | second)
+
+
+def uses_postgres(queryset):
+    return connections[queryset.db].vendor == 'postgresql'
+
+
+def recipe_search_vector():
+    ingredient_names = Subquery(
+        IngredientsInRecipe.objects
+        .filter(recipe=OuterRef('pk'))
+        .order_by()
+        .values('recipe')
+        .annotate(names=StringAgg('ingredient__name', ' '))
+        .values('names')
+    )
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(ingredient_names, weight='B', config=SEARCH_CONFIG)
+        + SearchVector('text', weight='C', config=SEARCH_CONFIG)
+    )
+
+
+class RecipeSearchIndex:
+    def __init__(self):
+        self._lock = Lock()
+        self._index = None
+
+    def invalidate(self):
+        self._index = None
+
+    def build(self):
+        postings = defaultdict(lambda: defaultdict(float))
+        documents = Recipe.objects.values_list('id', 'name', 'text')
+        for recipe_id, name, text in documents.iterator():
+            for field, value in (('name', name), ('text', text)):
+                for token in tokenize(value):
+                    postings[token][recipe_id] += WEIGHTS[field]
+        ingredients = IngredientsInRecipe.objects.values_list(
+            'recipe_id', 'ingredient__name'
+        )
+        for recipe_id, name in ingredients.iterator():
+            for token in tokenize(name):
+                postings[token][recipe_id] += WEIGHTS['ingredients']
+        return {
+            token: dict(recipes) for token, recipes in postings.items()
+        }, monotonic() + INDEX_TTL
+
+    def get_index(self):
+        index = self._index
+        if index is None or index[1] < monotonic():
+            with self._lock:
+                index = self._index
+                if index is None or index[1] < monotonic():
+                    index = self._index = self.build()
+        return index[0]
+
+    def match(self, postings, token):
+        prefix = stem(token)
+        matches = {
+            word: 1.0 if word == token else PREFIX_WEIGHT
+            for word in postings if word.startswith(prefix)
+        }
+        if not matches:
+            matches = {
+                word: score for word, score in (
+                    (word, similarity(token, word)) for word in postings
+                )
+                if score >= TRIGRAM_THRESHOLD
+            }
+        scores = defaultdict(float)
+        for word, weight in matches.items():
+            for recipe_id, score in postings[word].items():
+                scores[recipe_id] = max(scores[recipe_id], score * weight)
+        return scores
+
+    def search(self, query):
+        postings = self.get_index()
+        scores = None
+        for token in tokenize(query):
+            matched = self.match(postings, token)
+            if scores is None:
+                scores = matched
+            else:
+                scores = {
+                    recipe_id: score + matched[recipe_id]
+                    for recipe_id, score in scores.items()
+                    if recipe_id in matched
+                }
+            if not scores:
+                return []
+        if scores is None:
+            return []
+        return sorted(scores, key=lambda recipe_id: (
+            -scores[recipe_id], -recipe_id
+        ))
+
+
+recipe_search_index = RecipeSearchIndex()
+
+
+def update_search_vectors(queryset):
+    if uses_postgres(queryset):
+        queryset.update(search_vector=recipe_search_vector())
+    else:
+        recipe_search_index.invalidate()
+
+
+def search_recipes(queryset, query):
+    if uses_postgres(queryset):
+        search_query = SearchQuery(
+            query, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.annotate(
+            search_rank=SearchRank(F('search_vector'), search_query),
+            name_similarity=TrigramSimilarity('name', query),
+        ).filter(
+            Q(search_vector=search_query) | Q(name__trigram_similar=query)
+        ).order_by('-search_rank', '-name_similarity', '-pub_date')
+    return queryset.ranked(recipe_search_index.search(query))
@@ -0,0 +1,99 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .ingredient_index import ingredient_index
+from .models import (TAG_SLUGS_CACHE_KEY, Favorite, Ingredient,
+                     IngredientsInRecipe, Recipe, ShoppingCart,
+                     ShoppingCartItem, Tag, recipe_ingredients_changed,
+                     user_recipes_changed)
+from .pantry_index import pantry_index
+from .search import update_search_vectors
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_recipe_to_shopping_cart_items(sender, instance, created, **kwargs):
+    if created:
+        ShoppingCartItem.objects.add_recipe(
+            instance.user_id, instance.recipe_id, instance.servings
+        )
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def remove_recipe_from_shopping_cart_items(sender, instance, **kwargs):
+    ShoppingCartItem.objects.remove_recipe(
+        instance.user_id, instance.recipe_id, instance.servings
+    )
+
+
+RECIPE_COUNTERS = {
+    Favorite: 'favorites_count',
+    ShoppingCart: 'in_carts_count',
+}
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def increment_recipe_counter(sender, instance, created, **kwargs):
+    if created:
+        Recipe.objects.filter(pk=instance.recipe_id).change_counter(
+            RECIPE_COUNTERS[sender], 1
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def decrement_recipe_counter(sender, instance, **kwargs):
+    Recipe.objects.filter(pk=instance.recipe_id).change_counter(
+        RECIPE_COUNTERS[sender], -1
+    )
+
+
+@receiver(user_recipes_changed, sender=Favorite)
+@receiver(user_recipes_changed, sender=ShoppingCart)
+def change_recipe_counters(sender, instances, delta, **kwargs):
+    Recipe.objects.filter(
+        pk__in=[instance.recipe_id for instance in instances]
+    ).change_counter(RECIPE_COUNTERS[sender], delta)
+
+
+@receiver(user_recipes_changed, sender=ShoppingCart)
+def change_shopping_cart_items(sender, user_id, instances, delta, **kwargs):
+    ShoppingCartItem.objects.add_recipes(user_id, {
+        instance.recipe_id: instance.servings for instance in instances
+    }, sign=delta)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient_index(sender, **kwargs):
+    ingredient_index.invalidate()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_slugs(sender, **kwargs):
+    cache.delete(TAG_SLUGS_CACHE_KEY)
+
+
+@receiver(post_save, sender=Ingredient)
+def update_ingredient_recipes_search_vectors(sender, instance, created,
+                                             **kwargs):
+    if not created:
+        update_search_vectors(Recipe.objects.filter(ingredients=instance))
+
+
+def update_pantry_index(recipe_ids):
+    transaction.on_commit(lambda: pantry_index.mark_changed(recipe_ids))
+
+
+@receiver(post_save, sender=IngredientsInRecipe)
+@receiver(post_delete, sender=IngredientsInRecipe)
+def update_pantry_index_for_row(sender, instance, **kwargs):
+    update_pantry_index([instance.recipe_id])
+
+
+@receiver(recipe_ingredients_changed, sender=IngredientsInRecipe)
+def update_pantry_index_for_recipes(sender, recipe_ids, **kwargs):
+    update_pantry_index(recipe_ids)
@@ -0,0 +1,165 @@
+import heapq
+from collections import defaultdict
+from math import log, sqrt
+
+from django.db import transaction
+
+from .models import Favorite, IngredientsInRecipe, Recipe, RecipeSimilarity
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+TOP_K = 20
+BATCH_SIZE = 500
+INGREDIENT_WEIGHT = 0.6
+FAVORITE_WEIGHT = 0.4
+
+
+def load_features(ingredient_weight, favorite_weight):
+    ingredients = list(IngredientsInRecipe.objects.values_list(
+        'recipe_id', 'ingredient_id'
+    ).order_by())
+    favorites = list(Favorite.objects.values_list(
+        'recipe_id', 'user_id'
+    ).order_by())
+    return [
+        (ingredients, ingredient_weight, True),
+        (favorites, favorite_weight, False),
+    ]
+
+
+def column_weights(pairs, recipe_count, idf):
+    frequency = defaultdict(int)
+    for _, column in pairs:
+        frequency[column] += 1
+    if not idf:
+        return dict.fromkeys(frequency, 1.0)
+    return {
+        column: log(1 + recipe_count / count)
+        for column, count in frequency.items()
+    }
+
+
+def build_vectors(recipe_ids, features):
+    index = {recipe_id: position for position, recipe_id in enumerate(
+        recipe_ids
+    )}
+    vectors = []
+    for pairs, weight, idf in features:
+        weights = column_weights(pairs, len(recipe_ids), idf)
+        rows = defaultdict(dict)
+        for recipe_id, column in pairs:
+            if recipe_id in index:
+                rows[index[recipe_id]][column] = weights[column]
+        for row in rows.values():
+            norm = sqrt(sum(value * value for value in row.values()))
+            scale = sqrt(weight) / norm
+            for column in row:
+                row[column] *= scale
+        vectors.append(rows)
+    return vectors
+
+
+def build_postings(rows):
+    postings = defaultdict(list)
+    for position, row in rows.items():
+        for column, value in row.items():
+            postings[column].append((position, value))
+    return postings
+
+
+def top_k_python(recipe_ids, features, top_k):
+    vectors = [
+        (rows, build_postings(rows))
+        for rows in build_vectors(recipe_ids, features)
+    ]
+    for position, recipe_id in enumerate(recipe_ids):
+        scores = defaultdict(float)
+        for rows, postings in vectors:
+            for column, value in rows.get(position, {}).items():
+                for other, other_value in postings[column]:
+                    scores[other] += value * other_value
+        scores.pop(position, None)
+        for other, score in heapq.nlargest(
+                top_k, scores.items(), key=lambda item: (item[1], -item[0])):
+            yield recipe_id, recipe_ids[other], score
+
+
+def build_matrix(recipe_ids, features):
+    index = {recipe_id: position for position, recipe_id in enumerate(
+        recipe_ids
+    )}
+    blocks = []
+    for pairs, weight, idf in features:
+        weights = column_weights(pairs, len(recipe_ids), idf)
+        columns = {column: position for position, column in enumerate(
+            weights
+        )}
+        pairs = [pair for pair in pairs if pair[0] in index]
+        matrix = sparse.csr_matrix(
+            (
+                np.array([weights[column] for _, column in pairs]),
+                (
+                    np.array([index[recipe_id] for recipe_id, _ in pairs],
+                             dtype=np.int64),
+                    np.array([columns[column] for _, column in pairs],
+                             dtype=np.int64),
+                ),
+            ),
+            shape=(len(recipe_ids), max(len(columns), 1)),
+        )
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)))
+        norms = norms.ravel()
+        norms[norms == 0] = 1
+        blocks.append(sparse.diags(sqrt(weight) / norms) @ matrix)
+    return sparse.hstack(blocks).tocsr()
+
+
+def top_k_numpy(recipe_ids, features, top_k, batch_size):
+    matrix = build_matrix(recipe_ids, features)
+    transposed = matrix.T.tocsc()
+    for start in range(0, len(recipe_ids), batch_size):
+        scores = (matrix[start:start + batch_size] @ transposed).tocsr()
+        for offset in range(scores.shape[0]):
+            position = start + offset
+            row = slice(scores.indptr[offset], scores.indptr[offset + 1])
+            others, values = scores.indices[row], scores.data[row]
+            mask = others != position
+            others, values = others[mask], values[mask]
+            if len(values) > top_k:
+                best = np.argpartition(-values, top_k)[:top_k]
+                others, values = others[best], values[best]
+            for order in np.lexsort((others, -values)):
+                yield (
+                    recipe_ids[position],
+                    recipe_ids[others[order]],
+                    float(values[order]),
+                )
+
+
+def compute_similarities(top_k=TOP_K, batch_size=BATCH_SIZE,
+                         ingredient_weight=INGREDIENT_WEIGHT,
+                         favorite_weight=FAVORITE_WEIGHT):
+    recipe_ids = list(
+        Recipe.objects.order_by('id').values_list('id', flat=True)
+    )
+    features = load_features(ingredient_weight, favorite_weight)
+    if np is None:
+        return top_k_python(recipe_ids, features, top_k)
+    return top_k_numpy(recipe_ids, features, top_k, batch_size)
+
+
+def refresh_similarities(**options):
+    similarities = (
+        RecipeSimilarity(recipe_id=recipe_id, similar_id=similar_id,
+                         score=score)
+        for recipe_id, similar_id, score in compute_similarities(**options)
+        if score > 0
+    )
+    with transaction.atomic():
+        RecipeSimilarity.objects.all().delete()
+        RecipeSimilarity.objects.bulk_create(similarities, batch_size=1000)
+    return RecipeSimilarity.objects.count()
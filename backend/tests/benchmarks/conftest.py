@@ -0,0 +1,32 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from api.management.commands.benchmark_api import Command
+
+
+@pytest.fixture(scope='module')
+def seeded(django_db_setup, django_db_blocker, request):
+    with django_db_blocker.unblock():
+        call_command(
+            'seed_data',
+            users=request.config.getoption('seed_users'),
+            recipes_per_user=10,
+            favorites_per_user=20,
+            carts_per_user=5,
+            subscriptions_per_user=10,
+            stdout=StringIO(),
+        )
+        yield
+        call_command('flush', interactive=False, verbosity=0)
+
+
+@pytest.fixture(scope='module')
+def bench(seeded, django_db_blocker):
+    with django_db_blocker.unblock():
+        command = Command()
+        client = APIClient(HTTP_HOST='localhost')
+        client.force_authenticate(command.get_user(None))
+        return command, client, command.get_urls(command.get_recipe())
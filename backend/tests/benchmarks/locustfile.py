@@ -0,0 +1,60 @@
+"""Нагрузочный сценарий для locust поверх данных из seed_data.
+
+Запуск: locust -f tests/benchmarks/locustfile.py --host http://localhost
+"""
+import os
+import random
+
+from locust import HttpUser, between, task
+
+SEED_USERS = int(os.getenv('LOCUST_SEED_USERS', 100))
+SEED_PASSWORD = os.getenv('LOCUST_SEED_PASSWORD', 'seed-password')
+
+
+class AnonymousReader(HttpUser):
+    wait_time = between(0.5, 2)
+
+    @task(5)
+    def recipes(self):
+        self.client.get('/api/recipes/?limit=6')
+
+    @task(2)
+    def recipes_cursor(self):
+        self.client.get('/api/recipes/?limit=6&cursor=')
+
+    @task(1)
+    def tags(self):
+        self.client.get('/api/tags/')
+
+    @task(2)
+    def ingredients(self):
+        self.client.get('/api/ingredients/?name=мол')
+
+
+class SeedUser(HttpUser):
+    wait_time = between(1, 3)
+
+    def on_start(self):
+        number = random.randrange(SEED_USERS)
+        response = self.client.post('/api/auth/token/login/', json={
+            'email': f'seed_user_{number}@example.com',
+            'password': SEED_PASSWORD,
+        })
+        token = response.json()['auth_token']
+        self.client.headers['Authorization'] = f'Token {token}'
+
+    @task(5)
+    def recipes(self):
+        self.client.get('/api/recipes/?limit=6')
+
+    @task(3)
+    def subscriptions(self):
+        self.client.get('/api/users/subscriptions/?limit=6&recipes_limit=3')
+
+    @task(2)
+    def feed(self):
+        self.client.get('/api/recipes/feed/?limit=6')
+
+    @task(1)
+    def download_shopping_cart(self):
+        self.client.get('/api/recipes/download_shopping_cart/')
@@ -0,0 +1,30 @@
+import pytest
+from django.db import connection
+
+from api.management.commands.benchmark_api import ENDPOINTS
+
+QUERY_BUDGETS = {
+    'recipes_list': 6,
+    'recipes_cursor': 5,
+    'recipes_popular': 6,
+    'recipes_pantry': 7,
+    'recipes_search': 8,
+    'recipe_detail': 5,
+    'subscriptions': 3,
+    'ingredients_search': 1,
+    'download_shopping_cart': 1,
+}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', ENDPOINTS)
+def test_endpoint(benchmark, bench, name):
+    command, client, urls = bench
+    queries, peak = command.profile(client, urls[name])
+    benchmark.extra_info.update({
+        'vendor': connection.vendor,
+        'queries': queries,
+        'peak_memory_kb': round(peak / 1024, 1),
+    })
+    benchmark(command.request, client, urls[name])
+    assert queries <= QUERY_BUDGETS[name]
@@ -0,0 +1,49 @@
+import pytest
+from django.db import connection
+
+from recipes.ingredient_index import SEARCH_LIMIT, ingredient_index
+from recipes.models import Ingredient
+
+CATALOGUE_SIZE = 2500
+WORDS = ('масло', 'мука', 'молоко', 'сахар', 'соль', 'перец', 'сыр', 'яйцо')
+QUERIES = ('м', 'мо', 'сыр', 'ло', 'перец 1', 'нет такого')
+
+
+def orm_search(query, limit=SEARCH_LIMIT):
+    fields = ('id', 'name', 'measurement_unit')
+    result = list(
+        Ingredient.objects.filter(name__startswith=query)
+        .order_by('name').values(*fields)[:limit]
+    )
+    if len(result) < limit:
+        result += (
+            Ingredient.objects.filter(name__contains=query)
+            .exclude(name__startswith=query)
+            .order_by('name').values(*fields)[:limit - len(result)]
+        )
+    return result
+
+
+@pytest.fixture
+def catalogue(db):
+    Ingredient.objects.bulk_create(
+        Ingredient(
+            name=f'{WORDS[number % len(WORDS)]} {number}',
+            measurement_unit='г',
+        )
+        for number in range(CATALOGUE_SIZE)
+    )
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_index_matches_orm(catalogue, query):
+    assert ingredient_index.search(query) == orm_search(query)
+
+
+@pytest.mark.parametrize('search', (ingredient_index.search, orm_search),
+                         ids=('index', 'orm'))
+@pytest.mark.parametrize('query', ('мо', 'ло'), ids=('prefix', 'substring'))
+def test_search(benchmark, catalogue, search, query):
+    ingredient_index.get_index()
+    benchmark.extra_info['vendor'] = connection.vendor
+    assert benchmark(search, query)
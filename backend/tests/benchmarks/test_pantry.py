@@ -0,0 +1,63 @@
+import random
+from collections import Counter
+
+import pytest
+
+from recipes.pantry_index import PantryIndex
+
+RECIPES = 100_000
+CATALOGUE_SIZE = 2000
+INGREDIENTS_PER_RECIPE = 12
+
+
+@pytest.fixture(scope='module')
+def rows():
+    generator = random.Random(24)
+    return [
+        (recipe_id, ingredient_id)
+        for recipe_id in range(1, RECIPES + 1)
+        for ingredient_id in sorted(generator.sample(
+            range(1, CATALOGUE_SIZE + 1), INGREDIENTS_PER_RECIPE
+        ))
+    ]
+
+
+@pytest.fixture
+def index(rows):
+    index = PantryIndex()
+    index._index = index.build(index.get_generation(), rows)
+    return index
+
+
+@pytest.mark.parametrize('max_missing', (0, 3))
+def test_search(benchmark, rows, index, max_missing):
+    pantry = range(1, CATALOGUE_SIZE // 2 + 1)
+    missing = Counter(
+        recipe_id for recipe_id, ingredient_id in rows
+        if ingredient_id not in pantry
+    )
+    matches = benchmark(index.search, pantry, max_missing)
+    assert matches and sorted(matches) == [
+        recipe_id for recipe_id in range(1, RECIPES + 1)
+        if missing[recipe_id] <= max_missing
+    ]
+
+
+def test_build(benchmark, rows):
+    index = benchmark(PantryIndex().build, 1, rows)
+    assert len(index.sizes) == RECIPES + 1
+
+
+def test_update_one_recipe(benchmark, index, rows):
+    snapshot = index._index
+    changed = [(RECIPES // 2, ingredient_id) for ingredient_id in range(1, 31)]
+    updated = benchmark(
+        index.update, snapshot, snapshot.generation + 1,
+        [RECIPES // 2], changed,
+    )
+    assert updated.sizes[RECIPES // 2] == 30
+    assert snapshot.sizes[RECIPES // 2] == INGREDIENTS_PER_RECIPE
+    expected = index.build(snapshot.generation + 1, sorted(
+        [row for row in rows if row[0] != RECIPES // 2] + changed
+    ))
+    assert updated.postings == expected.postings
@@ -0,0 +1,70 @@
+from itertools import count
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import IngredientsInRecipe, ShoppingCart, ShoppingCartItem
+
+INGREDIENTS = 30
+QUERY_BUDGET = 20
+
+
+@pytest.fixture
+def big_recipe(make_recipe, ingredients, user):
+    recipe = make_recipe(amounts={
+        ingredient: 10 for ingredient in ingredients[:INGREDIENTS]
+    })
+    ShoppingCart.objects.create(user=user, recipe=recipe)
+    return recipe
+
+
+def patch_one(client, recipe, ingredients, amount):
+    payload = [
+        {'id': ingredient.pk, 'amount': 10} for ingredient in ingredients
+    ]
+    payload[0]['amount'] = amount
+    response = client.patch(
+        f'/api/recipes/{recipe.pk}/', {'ingredients': payload},
+        format='json',
+    )
+    assert response.status_code == 200
+    return response
+
+
+@pytest.mark.django_db
+def test_patch_one_of_thirty_ingredients(benchmark, author_client, user,
+                                         big_recipe, ingredients):
+    ingredients = ingredients[:INGREDIENTS]
+    rows = dict(IngredientsInRecipe.objects.filter(
+        recipe=big_recipe
+    ).values_list('ingredient_id', 'pk'))
+    with CaptureQueriesContext(connection) as context:
+        patch_one(author_client, big_recipe, ingredients, 11)
+    queries = context.captured_queries
+    benchmark.extra_info.update({
+        'vendor': connection.vendor,
+        'queries': len(queries),
+    })
+    amounts = count(12)
+    benchmark(
+        lambda: patch_one(author_client, big_recipe, ingredients,
+                          next(amounts))
+    )
+    amount = next(amounts) - 1
+    assert len(queries) <= QUERY_BUDGET
+    assert dict(IngredientsInRecipe.objects.filter(
+        recipe=big_recipe
+    ).values_list('ingredient_id', 'pk')) == rows
+    writes = [
+        query['sql'] for query in queries
+        if 'recipes_ingredientsinrecipe' in query['sql'].split(' WHERE')[0]
+        and not query['sql'].startswith('SELECT')
+    ]
+    assert len(writes) == 1 and writes[0].startswith('UPDATE')
+    assert ShoppingCartItem.objects.get(
+        user=user, ingredient=ingredients[0]
+    ).total_amount == amount
+    assert ShoppingCartItem.objects.get(
+        user=user, ingredient=ingredients[1]
+    ).total_amount == 10
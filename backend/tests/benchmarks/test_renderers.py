@@ -0,0 +1,42 @@
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer
+
+RECIPES = 1000
+INGREDIENTS_PER_RECIPE = 15
+
+PAGE = {
+    'count': RECIPES,
+    'next': None,
+    'previous': None,
+    'results': [
+        {
+            'id': number,
+            'tags': [{'id': 1, 'name': 'Завтрак', 'color': '#E26C2D',
+                      'slug': 'breakfast'}],
+            'author': {'id': 1, 'username': 'author',
+                       'email': 'author@example.com', 'first_name': 'Автор',
+                       'last_name': 'Тестов', 'is_subscribed': False},
+            'ingredients': [
+                {'id': line, 'name': f'продукт {line}',
+                 'measurement_unit': 'г', 'amount': line + 1}
+                for line in range(INGREDIENTS_PER_RECIPE)
+            ],
+            'is_favorited': False,
+            'is_in_shopping_cart': False,
+            'name': f'Рецепт {number}',
+            'image': f'http://localhost/media/images/{number}.webp',
+            'text': 'Описание рецепта ' * 20,
+            'cooking_time': 30,
+            'servings': 2,
+        }
+        for number in range(RECIPES)
+    ],
+}
+
+
+@pytest.mark.parametrize('renderer_class', (FastJSONRenderer, JSONRenderer),
+                         ids=('fast', 'drf'))
+def test_render_page(benchmark, renderer_class):
+    assert benchmark(renderer_class().render, PAGE)
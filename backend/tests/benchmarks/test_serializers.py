@@ -0,0 +1,69 @@
+import pytest
+
+from api.serializers import RecipeListSerializer, RecipeReadSerializer
+from recipes.models import Ingredient, IngredientsInRecipe, Recipe
+from tests.conftest import IMAGE_NAME
+from tests.test_serializers import make_request
+
+RECIPES = 1000
+INGREDIENTS_PER_RECIPE = 15
+
+
+@pytest.fixture
+def loaded_recipes(user, author, tags):
+    Ingredient.objects.bulk_create(
+        Ingredient(name=f'продукт {number}', measurement_unit='г')
+        for number in range(INGREDIENTS_PER_RECIPE * 4)
+    )
+    ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+    Recipe.objects.bulk_create(
+        Recipe(
+            name=f'Рецепт {number}', text='Описание', image=IMAGE_NAME,
+            author=author, cooking_time=10,
+        )
+        for number in range(RECIPES)
+    )
+    recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe_id=recipe_id, tag=tag)
+        for recipe_id in recipe_ids
+        for tag in tags[:2]
+    )
+    IngredientsInRecipe.objects.bulk_create(
+        (
+            IngredientsInRecipe(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_ids[
+                    (position + line) % len(ingredient_ids)
+                ],
+                amount=line + 1,
+            )
+            for position, recipe_id in enumerate(recipe_ids)
+            for line in range(INGREDIENTS_PER_RECIPE)
+        ),
+        batch_size=1000,
+    )
+    return list(Recipe.objects.for_read(user))
+
+
+def serialize(serializer_class, recipes, request):
+    return serializer_class(
+        recipes, many=True, context={'request': request}
+    ).data
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'serializer_class', (RecipeListSerializer, RecipeReadSerializer),
+    ids=('list', 'read'),
+)
+def test_serialize_recipes(benchmark, loaded_recipes, user,
+                           serializer_class):
+    data = benchmark(
+        serialize, serializer_class, loaded_recipes, make_request(user)
+    )
+    assert len(data) == RECIPES
+    assert all(
+        len(recipe['ingredients']) == INGREDIENTS_PER_RECIPE
+        for recipe in data
+    )
@@ -0,0 +1,85 @@
+import tracemalloc
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import (Ingredient, IngredientsInRecipe, Recipe,
+                            ShoppingCart, ShoppingCartItem)
+from tests.conftest import IMAGE_NAME
+
+CART_RECIPES = 1000
+LINES_PER_RECIPE = 20
+CATALOGUE_SIZE = 2000
+
+
+@pytest.fixture
+def big_cart(user, author):
+    Ingredient.objects.bulk_create(
+        Ingredient(name=f'продукт {number:04}', measurement_unit='г')
+        for number in range(CATALOGUE_SIZE)
+    )
+    ingredient_ids = list(
+        Ingredient.objects.order_by('name').values_list('id', flat=True)
+    )
+    Recipe.objects.bulk_create(
+        Recipe(
+            name=f'Рецепт {number}', text='Описание', image=IMAGE_NAME,
+            author=author, cooking_time=10,
+        )
+        for number in range(CART_RECIPES)
+    )
+    recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+    IngredientsInRecipe.objects.bulk_create(
+        (
+            IngredientsInRecipe(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_ids[
+                    (position * 7 + line * 97) % CATALOGUE_SIZE
+                ],
+                amount=10,
+            )
+            for position, recipe_id in enumerate(recipe_ids)
+            for line in range(LINES_PER_RECIPE)
+        ),
+        batch_size=1000,
+    )
+    ShoppingCart.objects.bulk_create(
+        ShoppingCart(user=user, recipe_id=recipe_id)
+        for recipe_id in recipe_ids
+    )
+    ShoppingCartItem.objects.rebuild([user.id])
+    return ShoppingCartItem.objects.filter(user=user).count()
+
+
+def download(client, url):
+    size = 0
+    for chunk in client.get(url).streaming_content:
+        size += len(chunk)
+    return size
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('format', ('txt', 'csv', 'json', 'pdf'))
+def test_download_shopping_cart(benchmark, big_cart, user_client, format):
+    url = f'/api/recipes/download_shopping_cart/?format={format}'
+    with CaptureQueriesContext(connection) as context:
+        response = user_client.get(url)
+        content = b''.join(response.streaming_content)
+    queries = len(context.captured_queries)
+    tracemalloc.start()
+    download(user_client, url)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    benchmark.extra_info.update({
+        'vendor': connection.vendor,
+        'queries': queries,
+        'lines': big_cart,
+        'size_kb': round(len(content) / 1024, 1),
+        'peak_memory_kb': round(peak / 1024, 1),
+    })
+    benchmark(download, user_client, url)
+    assert response.status_code == 200
+    assert queries == 1
+    if format == 'txt':
+        assert content.decode().count('\n') == big_cart + 2
@@ -0,0 +1,64 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Recipe
+from tests.conftest import IMAGE_NAME
+from users.models import MyUser, Subscriptions
+
+RECIPES_PER_AUTHOR = 5
+RECIPES_LIMIT = 3
+
+
+@pytest.fixture
+def follow(user):
+    def follow(count):
+        MyUser.objects.bulk_create(
+            MyUser(
+                username=f'followed{number}',
+                email=f'followed{number}@example.com',
+                first_name='Автор',
+                last_name=str(number),
+            )
+            for number in range(count)
+        )
+        authors = list(MyUser.objects.filter(username__startswith='followed'))
+        Recipe.objects.bulk_create(
+            Recipe(
+                name=f'Рецепт {number}', text='Описание', image=IMAGE_NAME,
+                author=author, cooking_time=10,
+            )
+            for author in authors
+            for number in range(RECIPES_PER_AUTHOR)
+        )
+        Subscriptions.objects.bulk_create(
+            Subscriptions(user=user, author=author) for author in authors
+        )
+    return follow
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('count', (10, 100, 1000))
+def test_subscriptions(benchmark, follow, user_client, count):
+    follow(count)
+    url = (
+        f'/api/users/subscriptions/?limit={count}'
+        f'&recipes_limit={RECIPES_LIMIT}'
+    )
+    with CaptureQueriesContext(connection) as context:
+        response = user_client.get(url)
+    queries = len(context.captured_queries)
+    benchmark.extra_info.update({
+        'vendor': connection.vendor,
+        'queries': queries,
+    })
+    response = benchmark(user_client.get, url)
+    authors = response.json()['results']
+    assert len(authors) == count
+    assert all(author['is_subscribed'] for author in authors)
+    assert all(
+        author['recipes_count'] == RECIPES_PER_AUTHOR
+        and len(author['recipes']) == RECIPES_LIMIT
+        for author in authors
+    )
+    assert queries == 3
@@ -0,0 +1,132 @@
+import base64
+from io import BytesIO
+
+import pytest
+from django.core.cache import cache
+from PIL import Image
+from rest_framework.test import APIClient
+
+from recipes.ingredient_index import ingredient_index
+from recipes.models import Ingredient, IngredientsInRecipe, Recipe, Tag
+from recipes.pantry_index import pantry_index
+from recipes.search import recipe_search_index
+from users.models import MyUser
+
+IMAGE_NAME = 'images/test.png'
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--seed-users',
+        type=int,
+        default=50,
+        help='Number of seeded users for the benchmark suite',
+    )
+
+
+def image_data_uri():
+    buffer = BytesIO()
+    Image.new('RGB', (2, 2), '#E26C2D').save(buffer, 'PNG')
+    encoded = base64.b64encode(buffer.getvalue()).decode('ascii')
+    return f'data:image/png;base64,{encoded}'
+
+
+@pytest.fixture(autouse=True)
+def reset_process_state():
+    cache.clear()
+    for index in (ingredient_index, recipe_search_index, pantry_index):
+        index.invalidate()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def make_user(db):
+    def make_user(username, **kwargs):
+        return MyUser.objects.create_user(
+            username=username,
+            email=f'{username}@example.com',
+            first_name=username.capitalize(),
+            last_name='Тестов',
+            password='test-password',
+            **kwargs,
+        )
+    return make_user
+
+
+@pytest.fixture
+def user(make_user):
+    return make_user('user')
+
+
+@pytest.fixture
+def author(make_user):
+    return make_user('author')
+
+
+@pytest.fixture
+def anon_client():
+    return APIClient()
+
+
+@pytest.fixture
+def make_client():
+    def make_client(user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+    return make_client
+
+
+@pytest.fixture
+def user_client(make_client, user):
+    return make_client(user)
+
+
+@pytest.fixture
+def author_client(make_client, author):
+    return make_client(author)
+
+
+@pytest.fixture
+def tags(db):
+    return [
+        Tag.objects.create(name=f'Тег {number}', color=f'#00000{number}',
+                           slug=f'tag-{number}')
+        for number in range(3)
+    ]
+
+
+@pytest.fixture
+def ingredients(db):
+    return [
+        Ingredient.objects.create(name=f'ингредиент {number}',
+                                  measurement_unit='г')
+        for number in range(30)
+    ]
+
+
+@pytest.fixture
+def make_recipe(db, author, tags, ingredients):
+    default_author, default_tags = author, tags[:1]
+    default_amounts = {ingredient: 10 for ingredient in ingredients[:3]}
+
+    def make_recipe(name='Рецепт', author=None, tags=None, amounts=None,
+                    **fields):
+        fields.setdefault('text', f'Описание: {name}')
+        fields.setdefault('cooking_time', 10)
+        recipe = Recipe.objects.create(
+            name=name, author=author or default_author, image=IMAGE_NAME,
+            **fields,
+        )
+        recipe.tags.set(default_tags if tags is None else tags)
+        IngredientsInRecipe.objects.bulk_create(
+            IngredientsInRecipe(
+                recipe=recipe, ingredient=ingredient, amount=amount
+            )
+            for ingredient, amount in (
+                default_amounts if amounts is None else amounts
+            ).items()
+        )
+        return recipe
+    return make_recipe
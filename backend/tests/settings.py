@@ -0,0 +1,24 @@
+import os
+import tempfile
+
+os.environ.setdefault('DB_ENGINE', 'django.db.backends.sqlite3')
+
+from foodgram.settings import *  # noqa: E402,F401,F403
+from foodgram.settings import DATABASES  # noqa: E402
+
+ALLOWED_HOSTS = ['testserver', 'localhost']
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='foodgram-tests-')
+
+IMAGE_WORKERS = 0
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+API_CACHE_ENABLED = True
+
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default']['OPTIONS'] = {'timeout': 30}
+    DATABASES['default']['TEST'] = {
+        'NAME': os.path.join(tempfile.mkdtemp(prefix='foodgram-db-'),
+                             'test.sqlite3'),
+    }
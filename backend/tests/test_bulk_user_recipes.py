@@ -0,0 +1,143 @@
+import pytest
+from django.core.management import call_command
+
+from recipes.models import Favorite, Recipe, ShoppingCart, ShoppingCartItem
+
+MODELS = {'favorite': Favorite, 'shopping_cart': ShoppingCart}
+COUNTERS = {'favorite': 'favorites_count', 'shopping_cart': 'in_carts_count'}
+
+
+def get_counters(recipes, action):
+    return list(Recipe.objects.filter(
+        pk__in=[recipe.pk for recipe in recipes]
+    ).order_by('pk').values_list(COUNTERS[action], flat=True))
+
+
+def cart_items(user):
+    return dict(ShoppingCartItem.objects.filter(user=user).values_list(
+        'ingredient__name', 'total_amount'
+    ))
+
+
+@pytest.fixture
+def recipes(make_recipe, ingredients):
+    return [
+        make_recipe(name=f'Рецепт {number}', amounts={
+            ingredients[0]: 10, ingredients[number + 1]: number + 1,
+        })
+        for number in range(3)
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('action', MODELS)
+def test_bulk_add(user, user_client, make_user, recipes, action):
+    model = MODELS[action]
+    model.objects.create(user=user, recipe=recipes[0])
+    model.objects.create(user=make_user('other'), recipe=recipes[1])
+    missing = recipes[-1].pk + 100
+    response = user_client.post(
+        f'/api/recipes/{action}/bulk/',
+        {'recipes': [recipes[0].pk, recipes[1].pk, missing, recipes[1].pk,
+                     recipes[2].pk]},
+        format='json',
+    )
+    assert response.status_code == 200
+    results = response.json()['results']
+    assert [(item['id'], item['status']) for item in results] == [
+        (recipes[0].pk, 'exists'),
+        (recipes[1].pk, 'added'),
+        (missing, 'not_found'),
+        (recipes[2].pk, 'added'),
+    ]
+    assert results[1]['recipe']['name'] == 'Рецепт 1'
+    assert 'recipe' not in results[2]
+    assert get_counters(recipes, action) == [1, 2, 1]
+    assert set(model.objects.filter(user=user).values_list(
+        'recipe_id', flat=True
+    )) == {recipe.pk for recipe in recipes}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('action', MODELS)
+def test_bulk_remove(user, user_client, make_user, recipes, action):
+    model = MODELS[action]
+    other = make_user('other')
+    for recipe in recipes[:2]:
+        model.objects.create(user=user, recipe=recipe)
+        model.objects.create(user=other, recipe=recipe)
+    response = user_client.delete(
+        f'/api/recipes/{action}/bulk/',
+        {'recipes': [recipes[1].pk, recipes[2].pk]},
+        format='json',
+    )
+    assert response.status_code == 200
+    assert response.json()['results'] == [
+        {'id': recipes[1].pk, 'status': 'removed'},
+        {'id': recipes[2].pk, 'status': 'absent'},
+    ]
+    assert get_counters(recipes, action) == [2, 1, 0]
+    assert list(model.objects.filter(user=user).values_list(
+        'recipe_id', flat=True
+    )) == [recipes[0].pk]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('action', MODELS)
+def test_clear(user, user_client, make_user, recipes, action):
+    model = MODELS[action]
+    other = make_user('other')
+    for recipe in recipes:
+        model.objects.create(user=user, recipe=recipe)
+    model.objects.create(user=other, recipe=recipes[0])
+    response = user_client.delete(f'/api/recipes/{action}/')
+    assert response.status_code == 200
+    assert response.json() == {'removed': 3}
+    assert not model.objects.filter(user=user).exists()
+    assert get_counters(recipes, action) == [1, 0, 0]
+    assert user_client.delete(
+        f'/api/recipes/{action}/'
+    ).json() == {'removed': 0}
+
+
+@pytest.mark.django_db
+def test_bulk_cart_keeps_aggregate(user, user_client, make_user, recipes):
+    other = make_user('other')
+    ShoppingCart.objects.create(user=other, recipe=recipes[0])
+    ShoppingCart.objects.create(user=user, recipe=recipes[0], servings=2)
+    user_client.post(
+        '/api/recipes/shopping_cart/bulk/',
+        {'recipes': [recipe.pk for recipe in recipes]},
+        format='json',
+    )
+    assert cart_items(user) == {
+        'ингредиент 0': 40, 'ингредиент 1': 2,
+        'ингредиент 2': 2, 'ингредиент 3': 3,
+    }
+    user_client.delete(
+        '/api/recipes/shopping_cart/bulk/',
+        {'recipes': [recipes[0].pk, recipes[2].pk]},
+        format='json',
+    )
+    assert cart_items(user) == {'ингредиент 0': 10, 'ингредиент 2': 2}
+    call_command('rebuild_shopping_cart_items', '--verify')
+    user_client.delete('/api/recipes/shopping_cart/')
+    assert cart_items(user) == {}
+    assert cart_items(other) == {'ингредиент 0': 10, 'ингредиент 1': 1}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('payload', (
+    {}, {'recipes': []}, {'recipes': [0]}, {'recipes': list(range(1, 102))},
+))
+def test_bulk_validation(user_client, payload):
+    response = user_client.post(
+        '/api/recipes/favorite/bulk/', payload, format='json'
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_bulk_requires_auth(anon_client, recipes):
+    response = anon_client.delete('/api/recipes/favorite/')
+    assert response.status_code == 401
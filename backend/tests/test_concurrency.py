@@ -0,0 +1,89 @@
+import threading
+from collections import Counter
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from rest_framework.test import APIClient
+
+from recipes.models import Favorite, Recipe, ShoppingCart, ShoppingCartItem
+from users.models import Subscriptions
+
+THREADS = 8
+ROUNDS = 5
+
+
+def hammer(user, method, url):
+    barrier = threading.Barrier(THREADS)
+    statuses = []
+
+    def tap():
+        client = APIClient()
+        client.force_authenticate(user)
+        try:
+            barrier.wait()
+            try:
+                statuses.append(getattr(client, method)(url).status_code)
+            except Exception as exc:
+                statuses.append(type(exc).__name__)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=tap) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return Counter(statuses)
+
+
+def cart_items(user):
+    return dict(ShoppingCartItem.objects.filter(user=user).values_list(
+        'ingredient_id', 'total_amount'
+    ))
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize('action, model', (
+    ('favorite', Favorite),
+    ('shopping_cart', ShoppingCart),
+))
+def test_double_tap_recipe(user, make_user, make_recipe, ingredients, action,
+                           model):
+    recipe = make_recipe()
+    other_recipe = make_recipe(amounts={ingredients[0]: 7})
+    others = [make_user(f'other{number}') for number in range(2)]
+    for other in others:
+        model.objects.create(user=other, recipe=recipe)
+        ShoppingCart.objects.get_or_create(user=other, recipe=other_recipe)
+    ShoppingCart.objects.create(user=user, recipe=other_recipe)
+    expected_items = {
+        other.pk: cart_items(other) for other in [*others, user]
+    }
+    url = f'/api/recipes/{recipe.pk}/{action}/'
+    for _ in range(ROUNDS):
+        assert hammer(user, 'post', url) == {201: 1, 400: THREADS - 1}
+        assert model.objects.filter(user=user, recipe=recipe).count() == 1
+        assert hammer(user, 'delete', url) == {204: 1, 400: THREADS - 1}
+        assert not model.objects.filter(user=user, recipe=recipe).exists()
+        recipe.refresh_from_db()
+        assert (recipe.favorites_count, recipe.in_carts_count) == (
+            Favorite.objects.filter(recipe=recipe).count(),
+            ShoppingCart.objects.filter(recipe=recipe).count(),
+        )
+        assert {
+            other.pk: cart_items(other) for other in [*others, user]
+        } == expected_items
+    call_command('reconcile_recipe_counters', '--verify')
+    call_command('rebuild_shopping_cart_items', '--verify')
+
+
+@pytest.mark.django_db(transaction=True)
+def test_double_tap_subscribe(user, author):
+    url = f'/api/users/{author.pk}/subscribe/'
+    for _ in range(ROUNDS):
+        assert hammer(user, 'post', url) == {201: 1, 400: THREADS - 1}
+        assert Subscriptions.objects.filter(user=user).count() == 1
+        assert hammer(user, 'delete', url) == {204: 1, 400: THREADS - 1}
+        assert not Subscriptions.objects.filter(user=user).exists()
+    assert Recipe.objects.count() == 0
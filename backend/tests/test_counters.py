@@ -0,0 +1,82 @@
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+
+
+def get_ids(response):
+    assert response.status_code == 200
+    return [recipe['id'] for recipe in response.json()['results']]
+
+
+@pytest.fixture
+def recipes(make_user, make_recipe):
+    recipes = [make_recipe(name=f'Рецепт {number}') for number in range(4)]
+    users = [make_user(f'user{number}') for number in range(3)]
+    for user in users:
+        Favorite.objects.create(user=user, recipe=recipes[1])
+    for user in users[:2]:
+        Favorite.objects.create(user=user, recipe=recipes[2])
+        ShoppingCart.objects.create(user=user, recipe=recipes[3])
+    ShoppingCart.objects.create(user=users[0], recipe=recipes[2])
+    Favorite.objects.create(user=users[0], recipe=recipes[3])
+    return recipes
+
+
+@pytest.mark.django_db
+def test_popular_ordering(anon_client, user_client, recipes,
+                          django_capture_on_commit_callbacks):
+    response = anon_client.get('/api/recipes/', {'ordering': 'popular'})
+    assert get_ids(response) == [
+        recipes[1].pk, recipes[2].pk, recipes[3].pk, recipes[0].pk
+    ]
+    with django_capture_on_commit_callbacks(execute=True):
+        for recipe in recipes[2:]:
+            assert user_client.post(
+                f'/api/recipes/{recipe.pk}/favorite/'
+            ).status_code == 201
+    response = anon_client.get('/api/recipes/', {'ordering': 'popular'})
+    assert get_ids(response) == [
+        recipes[2].pk, recipes[1].pk, recipes[3].pk, recipes[0].pk
+    ]
+    response = anon_client.get('/api/recipes/', {'ordering': 'name'})
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_counters_follow_toggles(user_client, recipes):
+    recipe = recipes[0]
+    url = f'/api/recipes/{recipe.pk}/'
+    assert user_client.post(url + 'favorite/').status_code == 201
+    assert user_client.post(url + 'shopping_cart/').status_code == 201
+    recipe.refresh_from_db()
+    assert (recipe.favorites_count, recipe.in_carts_count) == (1, 1)
+    assert user_client.delete(url + 'favorite/').status_code == 204
+    assert user_client.delete(url + 'favorite/').status_code == 400
+    recipe.refresh_from_db()
+    assert (recipe.favorites_count, recipe.in_carts_count) == (0, 1)
+
+
+@pytest.mark.django_db
+def test_extra_decrement_is_an_error(recipes):
+    with pytest.raises(IntegrityError):
+        Recipe.objects.filter(pk=recipes[0].pk).change_counter(
+            'favorites_count', -1
+        )
+
+
+@pytest.mark.django_db
+def test_reconcile_recipe_counters(capsys, recipes):
+    call_command('reconcile_recipe_counters', '--verify')
+    assert 'Счетчики совпадают: 4 рецептов' in capsys.readouterr().out
+    Recipe.objects.filter(pk=recipes[1].pk).update(favorites_count=0)
+    Recipe.objects.filter(pk=recipes[0].pk).update(in_carts_count=5)
+    with pytest.raises(CommandError, match='Найдено расхождений: 2'):
+        call_command('reconcile_recipe_counters', '--verify')
+    call_command('reconcile_recipe_counters')
+    assert 'исправлено: 2' in capsys.readouterr().out
+    assert list(Recipe.objects.order_by('pk').values_list(
+        'favorites_count', 'in_carts_count'
+    )) == [(0, 0), (3, 0), (2, 1), (1, 2)]
+    call_command('reconcile_recipe_counters', '--verify')
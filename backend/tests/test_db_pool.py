@@ -0,0 +1,99 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+from psycopg2 import extensions, pool
+
+from foodgram.db.base import BlockingConnectionPool, DatabaseWrapper
+
+POOL_SETTINGS = {'CHECK_IDLE_AFTER': 30}
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.info = SimpleNamespace(
+            transaction_status=extensions.TRANSACTION_STATUS_IDLE
+        )
+        self.queries = 0
+
+    def close(self):
+        self.closed = 1
+
+    def cursor(self):
+        connection = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                pass
+
+            def execute(self, sql):
+                connection.queries += 1
+
+        return Cursor()
+
+
+@pytest.fixture(autouse=True)
+def fake_connect(monkeypatch):
+    monkeypatch.setattr(
+        pool.psycopg2, 'connect', lambda *args, **kwargs: FakeConnection()
+    )
+
+
+def make_wrapper():
+    wrapper = DatabaseWrapper.__new__(DatabaseWrapper)
+    wrapper.settings_dict = {
+        'CONN_HEALTH_CHECKS': True, 'POOL': POOL_SETTINGS,
+    }
+    return wrapper
+
+
+def test_getconn_waits_for_a_free_connection():
+    connection_pool = BlockingConnectionPool(1, 1, timeout=5)
+    connection = connection_pool.getconn()
+    released = threading.Timer(
+        0.1, connection_pool.putconn, (connection, )
+    )
+    released.start()
+    assert connection_pool.getconn() is connection
+    released.join()
+
+
+def test_getconn_raises_after_timeout():
+    connection_pool = BlockingConnectionPool(1, 1, timeout=0.05)
+    connection_pool.getconn()
+    with pytest.raises(pool.PoolError):
+        connection_pool.getconn()
+
+
+def test_closed_connections_free_their_slot():
+    connection_pool = BlockingConnectionPool(1, 1, timeout=0.05)
+    connection_pool.putconn(connection_pool.getconn(), close=True)
+    assert not connection_pool.getconn().closed
+
+
+def test_health_check_only_after_idle_threshold():
+    wrapper = make_wrapper()
+    connection = FakeConnection()
+    assert wrapper.is_alive(connection, 0)
+    assert wrapper.is_alive(connection, 29)
+    assert connection.queries == 0
+    assert wrapper.is_alive(connection, 31)
+    assert connection.queries == 1
+    connection.close()
+    assert not wrapper.is_alive(connection, 0)
+
+
+def test_idle_time_starts_when_connection_is_returned(monkeypatch):
+    connection_pool = BlockingConnectionPool(1, 1)
+    connection = connection_pool.getconn()
+    assert connection_pool.idle_time(connection) < 1
+    clock = iter((100, 145))
+    monkeypatch.setattr(
+        'foodgram.db.base.monotonic', lambda: next(clock)
+    )
+    connection_pool.putconn(connection)
+    assert connection_pool.idle_time(connection_pool.getconn()) == 45
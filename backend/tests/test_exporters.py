@@ -0,0 +1,96 @@
+import csv
+import io
+import json
+import os
+
+import pytest
+from django.conf import settings
+
+from recipes.models import ShoppingCart
+
+URL = '/api/recipes/download_shopping_cart/'
+ROWS = [
+    ('ингредиент 0', 15, 'г'),
+    ('ингредиент 1', 10.5, 'г'),
+    ('ингредиент 2', 5, 'г'),
+]
+
+
+@pytest.fixture
+def cart(user, make_recipe, ingredients):
+    first, second, third = ingredients[:3]
+    for amounts in ({first: 10, second: 7}, {first: 5, third: 5}):
+        ShoppingCart.objects.create(user=user, recipe=make_recipe(
+            amounts=amounts
+        ))
+    ShoppingCart.objects.create(
+        user=user,
+        recipe=make_recipe(amounts={second: 7}, servings=2),
+        servings=1,
+    )
+
+
+def download(client, format):
+    response = client.get(URL, {'format': format})
+    assert response.status_code == 200
+    assert response['Content-Disposition'] == (
+        f'attachment; filename="shop_list.{format}"'
+    )
+    return response, b''.join(response.streaming_content)
+
+
+@pytest.mark.django_db
+def test_txt(user_client, cart):
+    response, content = download(user_client, 'txt')
+    assert response['Content-Type'] == 'text/plain; charset=utf-8'
+    assert content.decode() == 'Список покупок\n\n' + ''.join(
+        f'{name} - {amount} {unit}.\n' for name, amount, unit in ROWS
+    )
+
+
+@pytest.mark.django_db
+def test_csv(user_client, cart):
+    _, content = download(user_client, 'csv')
+    assert list(csv.reader(io.StringIO(content.decode()))) == [
+        ['Ингредиент', 'Количество', 'Единицы измерения'],
+        *[[name, str(amount), unit] for name, amount, unit in ROWS],
+    ]
+
+
+@pytest.mark.django_db
+def test_json(user_client, cart):
+    _, content = download(user_client, 'json')
+    assert json.loads(content) == [
+        {'name': name, 'amount': amount, 'measurement_unit': unit}
+        for name, amount, unit in ROWS
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(
+    not os.path.exists(settings.SHOPPING_LIST_PDF_FONT),
+    reason='Нет шрифта для PDF',
+)
+def test_pdf(user_client, cart):
+    response, content = download(user_client, 'pdf')
+    assert response['Content-Type'] == 'application/pdf'
+    assert content.startswith(b'%PDF-')
+    assert content.rstrip().endswith(b'%%EOF')
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('font', ('missing.ttf', 'broken.ttf'))
+def test_pdf_without_font(user_client, cart, settings, tmp_path, font):
+    (tmp_path / 'broken.ttf').write_bytes(b'not a font')
+    settings.SHOPPING_LIST_PDF_FONT = str(tmp_path / font)
+    response = user_client.get(URL, {'format': 'pdf'})
+    assert response.status_code == 503
+    assert not response.streaming
+    assert 'шрифт' in response.json()['detail']
+
+
+@pytest.mark.django_db
+def test_empty_cart_and_unknown_format(user_client):
+    _, content = download(user_client, 'json')
+    assert json.loads(content) == []
+    assert user_client.get(URL, {'format': 'xml'}).status_code == 400
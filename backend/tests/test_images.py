@@ -0,0 +1,109 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.db import transaction
+from PIL import Image
+
+from recipes import images
+from recipes.images import RENDITIONS, schedule_renditions
+from recipes.models import Recipe
+from tests.conftest import image_data_uri
+
+
+def rendition_paths(recipe):
+    recipe.refresh_from_db()
+    return [getattr(recipe, field).path for field in RENDITIONS]
+
+
+@pytest.fixture
+def recipe(author_client, tags, ingredients,
+           django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        response = author_client.post('/api/recipes/', {
+            'name': 'Рецепт', 'text': 'Описание', 'cooking_time': 10,
+            'image': image_data_uri(), 'tags': [tags[0].pk],
+            'ingredients': [{'id': ingredients[0].pk, 'amount': 10}],
+        }, format='json')
+    assert response.status_code == 201
+    return Recipe.objects.get(pk=response.json()['id'])
+
+
+@pytest.mark.django_db
+def test_renditions_are_generated(recipe):
+    for path, size in zip(rendition_paths(recipe), RENDITIONS.values()):
+        with Image.open(path) as image:
+            assert image.format == 'WEBP'
+            assert image.width <= size[0] and image.height <= size[1]
+
+
+@pytest.mark.django_db
+def test_serializers_use_renditions(anon_client, user_client, recipe):
+    base = 'http://testserver'
+    detail = anon_client.get(f'/api/recipes/{recipe.pk}/').json()
+    assert detail['image'] == base + recipe.image_medium.url
+    listing = anon_client.get('/api/recipes/').json()['results']
+    assert listing[0]['image'] == base + recipe.image_medium.url
+    response = user_client.post(f'/api/recipes/{recipe.pk}/favorite/')
+    assert response.json()['image'] == base + recipe.image_thumbnail.url
+    Recipe.objects.filter(pk=recipe.pk).update(
+        **dict.fromkeys(RENDITIONS, '')
+    )
+    response = user_client.post(f'/api/recipes/{recipe.pk}/shopping_cart/')
+    assert response.json()['image'] == base + recipe.image.url
+
+
+@pytest.mark.django_db
+def test_new_image_replaces_renditions_after_commit(
+    author_client, recipe, django_capture_on_commit_callbacks
+):
+    old_paths = rendition_paths(recipe)
+    with django_capture_on_commit_callbacks(execute=True):
+        response = author_client.patch(
+            f'/api/recipes/{recipe.pk}/', {'image': image_data_uri()},
+            format='json',
+        )
+    assert response.status_code == 200
+    new_paths = rendition_paths(recipe)
+    assert all(os.path.exists(path) for path in new_paths)
+    assert not any(
+        os.path.exists(path) for path in set(old_paths) - set(new_paths)
+    )
+
+
+@pytest.mark.django_db
+def test_rollback_keeps_renditions(recipe,
+                                   django_capture_on_commit_callbacks):
+    paths = rendition_paths(recipe)
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                schedule_renditions(recipe)
+                raise RuntimeError
+    assert not callbacks
+    assert rendition_paths(recipe) == paths
+    assert all(os.path.exists(path) for path in paths)
+
+
+@pytest.mark.django_db
+def test_worker_logs_failures(monkeypatch, caplog, recipe):
+    def fail(recipe_id):
+        raise OSError('битый файл')
+
+    monkeypatch.setattr(images, 'generate_renditions', fail)
+    images.generate_renditions_in_worker(recipe.pk)
+    assert f'картинку рецепта {recipe.pk}' in caplog.text
+    assert 'битый файл' in caplog.text
+
+
+@pytest.mark.django_db(transaction=True)
+def test_worker_generates_renditions(settings, monkeypatch, recipe):
+    executor = ThreadPoolExecutor(max_workers=1)
+    settings.IMAGE_WORKERS = 1
+    monkeypatch.setattr(images, 'get_executor', lambda: executor)
+    Recipe.objects.filter(pk=recipe.pk).update(
+        **dict.fromkeys(RENDITIONS, '')
+    )
+    schedule_renditions(recipe)
+    executor.shutdown(wait=True)
+    assert all(os.path.exists(path) for path in rendition_paths(recipe))
@@ -0,0 +1,132 @@
+import logging
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.instrumentation import (SLOWEST_QUERIES, RequestMetrics,
+                                 endpoint_registry, instrument_serializers)
+from recipes.models import ShoppingCart
+
+SERVER_TIMING = re.compile(
+    r'db;dur=[\d.]+;desc="(\d+) queries", '
+    r'serialize;dur=([\d.]+), total;dur=[\d.]+'
+)
+
+
+@pytest.fixture(autouse=True)
+def instrumentation(settings):
+    settings.MIDDLEWARE = [
+        'api.middleware.InstrumentationMiddleware', *settings.MIDDLEWARE
+    ]
+    settings.INSTRUMENTATION_SLOW_REQUEST_MS = 10 ** 6
+    instrument_serializers()
+    endpoint_registry.reset()
+    yield
+    endpoint_registry.reset()
+
+
+@pytest.fixture
+def staff_client(make_user, make_client):
+    return make_client(make_user('admin', is_staff=True))
+
+
+@pytest.mark.django_db
+def test_server_timing_counts_queries(anon_client, make_recipe):
+    make_recipe()
+    with CaptureQueriesContext(connection) as context:
+        response = anon_client.get('/api/recipes/')
+    assert response.status_code == 200
+    queries, serializer_ms = SERVER_TIMING.fullmatch(
+        response['Server-Timing']
+    ).groups()
+    assert int(queries) == len(context.captured_queries) > 0
+    assert float(serializer_ms) > 0
+
+
+@pytest.mark.django_db
+def test_registry_aggregates_requests(anon_client, user, user_client,
+                                      make_recipe):
+    recipe = make_recipe()
+    sizes = [
+        len(anon_client.get(f'/api/recipes/{recipe.pk}/').content)
+        for _ in range(3)
+    ]
+    ShoppingCart.objects.create(user=user, recipe=recipe)
+    response = user_client.get('/api/recipes/download_shopping_cart/')
+    assert response.streaming
+    report = endpoint_registry.snapshot()
+    detail = report['GET api:recipes-detail']
+    assert detail['requests'] == detail['window'] == 3
+    assert detail['avg_response_bytes'] == round(sum(sizes) / 3, 2)
+    assert detail['max_queries'] >= detail['avg_queries'] > 0
+    assert detail['avg_serializer_ms'] > 0
+    assert set(detail['duration_ms']) == {'p50', 'p95', 'p99'}
+    download = report['GET api:recipes-download-shopping-cart']
+    assert download['avg_response_bytes'] == 0
+
+
+@pytest.mark.django_db
+def test_slow_request_is_logged(settings, caplog, anon_client, make_recipe):
+    make_recipe()
+    with caplog.at_level(logging.WARNING, logger='api.instrumentation'):
+        anon_client.get('/api/recipes/')
+        assert not caplog.records
+        settings.INSTRUMENTATION_SLOW_REQUEST_MS = 0
+        anon_client.get('/api/recipes/', {'limit': 1})
+    [record] = caplog.records
+    message = record.getMessage()
+    assert message.startswith(
+        'Медленный запрос GET api:recipes-list /api/recipes/?limit=1'
+    )
+    assert 'SELECT' in message
+
+
+def test_slowest_queries_are_bounded():
+    metrics = RequestMetrics()
+    for number in range(SLOWEST_QUERIES * 2):
+        metrics.add_query(f'SELECT {number}', number / 1000)
+    assert metrics.queries == SLOWEST_QUERIES * 2
+    assert [sql for _, sql in metrics.slowest_queries()] == [
+        f'SELECT {number}'
+        for number in range(SLOWEST_QUERIES * 2 - 1, SLOWEST_QUERIES - 1, -1)
+    ]
+
+
+@pytest.mark.django_db
+def test_metrics_are_staff_only(anon_client, user_client, staff_client):
+    assert anon_client.get('/api/_metrics/').status_code == 401
+    assert user_client.get('/api/_metrics/').status_code == 403
+    assert user_client.delete('/api/_metrics/').status_code == 403
+    assert staff_client.get('/api/_metrics/').status_code == 200
+    assert anon_client.get('/api/_metrics/cache/').status_code == 401
+    assert staff_client.get('/api/_metrics/cache/').status_code == 200
+
+
+@pytest.mark.django_db
+def test_metrics_formats(anon_client, staff_client, tags):
+    for _ in range(2):
+        anon_client.get('/api/tags/')
+    report = staff_client.get('/api/_metrics/').json()
+    assert report['GET api:tags-list']['requests'] == 2
+    response = staff_client.get('/api/_metrics/', {'format': 'prometheus'})
+    assert response['Content-Type'] == 'text/plain; charset=utf-8'
+    lines = response.content.decode().splitlines()
+    labels = 'method="GET",view="api:tags-list"'
+    assert f'foodgram_http_requests_total{{{labels}}} 2' in lines
+    for quantile in ('0.5', '0.95', '0.99'):
+        assert any(
+            line.startswith(
+                f'foodgram_http_duration_ms{{{labels},quantile="{quantile}"}}'
+            )
+            for line in lines
+        )
+    assert any(
+        line.startswith(f'foodgram_http_avg_queries{{{labels}}}')
+        for line in lines
+    )
+    assert staff_client.delete('/api/_metrics/').status_code == 204
+    assert list(endpoint_registry.snapshot()) == [
+        'DELETE api:request-metrics'
+    ]
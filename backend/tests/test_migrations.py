@@ -0,0 +1,63 @@
+from importlib import import_module
+
+import pytest
+from django.apps import apps
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+
+from recipes.models import (Ingredient, IngredientsInRecipe, ShoppingCart,
+                            ShoppingCartItem)
+
+merge_duplicate_ingredients = import_module(
+    'recipes.migrations.0003_unique_ingredient'
+).merge_duplicate_ingredients
+
+
+@pytest.fixture
+def duplicates_allowed(transactional_db):
+    constraint = next(
+        constraint for constraint in Ingredient._meta.constraints
+        if constraint.name == 'unique_ingredient'
+    )
+    historical = MigrationLoader(connection).project_state(
+        ('recipes', '0002_shoppingcartitem')
+    ).apps.get_model('recipes', 'Ingredient')
+    with connection.schema_editor() as editor:
+        editor.remove_constraint(historical, constraint)
+    yield
+    with connection.schema_editor() as editor:
+        editor.add_constraint(Ingredient, constraint)
+
+
+def test_merge_duplicate_ingredients_keeps_amounts(duplicates_allowed, user,
+                                                   make_recipe):
+    kept, first, second = [
+        Ingredient.objects.create(name='соль', measurement_unit='г')
+        for _ in range(3)
+    ]
+    recipes = [
+        make_recipe(f'Рецепт {number}', amounts=amounts)
+        for number, amounts in enumerate((
+            {kept: 1, first: 2, second: 4},
+            {first: 8, second: 16},
+            {second: 32},
+        ))
+    ]
+    for recipe in recipes:
+        ShoppingCart.objects.create(user=user, recipe=recipe)
+
+    merge_duplicate_ingredients(apps, None)
+
+    assert list(Ingredient.objects.filter(name='соль').values_list(
+        'id', flat=True
+    )) == [kept.pk]
+    assert list(IngredientsInRecipe.objects.order_by(
+        'recipe_id'
+    ).values_list('recipe_id', 'ingredient_id', 'amount')) == [
+        (recipes[0].pk, kept.pk, 7),
+        (recipes[1].pk, kept.pk, 24),
+        (recipes[2].pk, kept.pk, 32),
+    ]
+    assert list(ShoppingCartItem.objects.values_list(
+        'ingredient_id', 'total_amount'
+    )) == [(kept.pk, 63)]
@@ -0,0 +1,132 @@
+import json
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from recipes.models import Recipe
+from users.models import Subscriptions
+
+
+def walk(client, url, params):
+    ids, pages = [], 0
+    response = client.get(url, params)
+    while True:
+        assert response.status_code == 200
+        data = response.json()
+        assert data['previous'] is None
+        ids.extend(item['id'] for item in data['results'])
+        pages += 1
+        if data['next'] is None:
+            return ids, pages
+        assert 'cursor=' in data['next']
+        response = client.get(data['next'])
+
+
+def encode(position):
+    return urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+@pytest.fixture
+def recipes(make_user, make_recipe):
+    authors = [make_user(f'author{number}') for number in range(2)]
+    recipes = [
+        make_recipe(f'Рецепт {number}', author=authors[number % 2])
+        for number in range(11)
+    ]
+    now = timezone.now()
+    for number, recipe in enumerate(recipes):
+        Recipe.objects.filter(pk=recipe.pk).update(
+            pub_date=now - timedelta(minutes=number // 3)
+        )
+    return recipes
+
+
+def expected_ids(queryset):
+    return list(queryset.order_by('-pub_date', '-id').values_list(
+        'id', flat=True
+    ))
+
+
+@pytest.mark.django_db
+def test_recipes_cursor_walk(anon_client, recipes):
+    ids, pages = walk(anon_client, '/api/recipes/', {'cursor': '', 'limit': 4})
+    assert ids == expected_ids(Recipe.objects.all())
+    assert pages == 3
+
+
+@pytest.mark.django_db
+def test_feed_cursor_walk(user, user_client, recipes):
+    author = recipes[0].author
+    Subscriptions.objects.create(user=user, author=author)
+    response = user_client.get('/api/recipes/feed/', {'limit': 2})
+    assert response.json()['count'] is None
+    ids, _ = walk(user_client, '/api/recipes/feed/', {'limit': 2})
+    assert ids == expected_ids(Recipe.objects.filter(author=author))
+    response = user_client.get(
+        '/api/recipes/feed/', {'search': 'Рецепт', 'ordering': 'popular'}
+    )
+    assert response.status_code == 400
+    assert set(response.json()) == {'search', 'ordering'}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('cursor', (
+    'не base64', encode({'a': 1}), encode([1]),
+    encode(['не дата', 1]), encode(['2020-01-01T00:00:00', 'x']),
+))
+def test_invalid_cursor(anon_client, recipes, cursor):
+    response = anon_client.get('/api/recipes/', {'cursor': cursor})
+    assert response.status_code == 404
+    assert response.json() == {'detail': 'Неверный курсор'}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('param', ('search', 'pantry', 'ordering'))
+def test_incompatible_params_fall_back_to_pages(anon_client, recipes,
+                                                ingredients, param):
+    params = {
+        'search': 'Рецепт',
+        'pantry': ','.join(str(item.pk) for item in ingredients[:3]),
+        'ordering': 'popular',
+    }
+    response = anon_client.get(
+        '/api/recipes/', {'cursor': encode(['2020-01-01', 1]), 'limit': 2,
+                          param: params[param]}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data['count'] == len(recipes)
+    assert len(data['results']) == 2
+    assert 'page=2' in data['next']
+
+
+@pytest.mark.django_db
+def test_users_cursor_walk(anon_client, make_user):
+    users = [make_user(f'user{number:02}') for number in range(7)]
+    ids, pages = walk(anon_client, '/api/users/', {'cursor': '', 'limit': 3})
+    assert ids == [user.pk for user in users]
+    assert pages == 3
+
+
+@pytest.mark.django_db
+def test_subscriptions_cursor_walk(user, user_client, make_user,
+                                   make_recipe):
+    authors = [make_user(f'author{number:02}') for number in range(5)]
+    for author in authors:
+        Subscriptions.objects.create(user=user, author=author)
+        make_recipe(author=author)
+    make_user('stranger')
+    ids, pages = walk(
+        user_client, '/api/users/subscriptions/',
+        {'cursor': '', 'limit': 2, 'recipes_limit': 1},
+    )
+    assert ids == [author.pk for author in authors]
+    assert pages == 3
+    response = user_client.get(
+        '/api/users/subscriptions/', {'limit': 2, 'page': 3}
+    )
+    assert [item['id'] for item in response.json()['results']] == [
+        authors[4].pk
+    ]
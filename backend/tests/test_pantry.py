@@ -0,0 +1,158 @@
+import random
+
+import pytest
+from django.core.cache import cache
+
+from recipes.models import IngredientsInRecipe, Recipe
+from recipes.pantry_index import (CHANGES_KEY, PantryIndex, pantry_index)
+from tests.conftest import IMAGE_NAME
+
+
+def get_ids(response):
+    assert response.status_code == 200
+    return [recipe['id'] for recipe in response.json()['results']]
+
+
+def pantry_query(ingredients, **params):
+    return {
+        'pantry': ','.join(str(ingredient.pk) for ingredient in ingredients),
+        **params,
+    }
+
+
+@pytest.fixture
+def kitchen(make_recipe, ingredients):
+    first, second, third, fourth = ingredients[:4]
+    return {
+        'full': make_recipe(name='Полный', amounts={first: 1, second: 1}),
+        'one_missing': make_recipe(
+            name='Без одного', amounts={first: 1, second: 1, fourth: 1}
+        ),
+        'two_missing': make_recipe(
+            name='Без двух', amounts={first: 1, third: 1, fourth: 1}
+        ),
+        'unrelated': make_recipe(
+            name='Другой', amounts={ingredients[10]: 1}
+        ),
+    }
+
+
+@pytest.mark.django_db
+def test_pantry_filter(anon_client, kitchen, ingredients):
+    pantry = ingredients[:2]
+    response = anon_client.get('/api/recipes/', pantry_query(pantry))
+    assert get_ids(response) == [kitchen['full'].pk]
+    response = anon_client.get(
+        '/api/recipes/', pantry_query(pantry, max_missing=2)
+    )
+    assert get_ids(response) == [
+        kitchen['full'].pk, kitchen['one_missing'].pk,
+        kitchen['two_missing'].pk,
+    ]
+    response = anon_client.get(
+        '/api/recipes/', pantry_query(pantry, max_missing=-1)
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_pantry_results_are_not_capped(anon_client, author, ingredients):
+    Recipe.objects.bulk_create(
+        Recipe(name=f'Рецепт {number}', text='Описание', image=IMAGE_NAME,
+               author=author, cooking_time=10)
+        for number in range(250)
+    )
+    IngredientsInRecipe.objects.bulk_create(
+        IngredientsInRecipe(recipe=recipe, ingredient=ingredients[0],
+                            amount=1)
+        for recipe in Recipe.objects.all()
+    )
+    response = anon_client.get(
+        '/api/recipes/', pantry_query(ingredients[:1], limit=100, page=3)
+    )
+    assert response.json()['count'] == 250
+    assert len(get_ids(response)) == 50
+
+
+@pytest.mark.django_db
+def test_index_follows_ingredient_changes(
+    monkeypatch, anon_client, author_client, kitchen, ingredients,
+    django_capture_on_commit_callbacks
+):
+    pantry = ingredients[:2]
+    assert get_ids(anon_client.get(
+        '/api/recipes/', pantry_query(pantry)
+    )) == [kitchen['full'].pk]
+
+    def fail(*args, **kwargs):
+        raise AssertionError('Индекс перестроен целиком')
+
+    monkeypatch.setattr(pantry_index, 'build', fail)
+    recipe = kitchen['one_missing']
+    with django_capture_on_commit_callbacks(execute=True):
+        response = author_client.patch(
+            f'/api/recipes/{recipe.pk}/',
+            {'ingredients': [{'id': ingredients[0].pk, 'amount': 1},
+                             {'id': ingredients[1].pk, 'amount': 2}]},
+            format='json',
+        )
+    assert response.status_code == 200
+    assert set(get_ids(anon_client.get(
+        '/api/recipes/', pantry_query(pantry)
+    ))) == {kitchen['full'].pk, recipe.pk}
+    with django_capture_on_commit_callbacks(execute=True):
+        assert author_client.delete(
+            f'/api/recipes/{kitchen["full"].pk}/'
+        ).status_code == 204
+        IngredientsInRecipe.objects.create(
+            recipe=kitchen['unrelated'], ingredient=ingredients[0], amount=1
+        )
+    assert get_ids(anon_client.get(
+        '/api/recipes/', pantry_query(pantry, max_missing=1)
+    )) == [recipe.pk, kitchen['unrelated'].pk]
+
+
+@pytest.mark.django_db
+def test_other_processes_apply_changes(kitchen, ingredients,
+                                       django_capture_on_commit_callbacks):
+    other = PantryIndex()
+    pantry = [ingredient.pk for ingredient in ingredients[:2]]
+    other.get_index()
+    with django_capture_on_commit_callbacks(execute=True):
+        IngredientsInRecipe.objects.filter(
+            recipe=kitchen['one_missing'], ingredient=ingredients[3]
+        ).delete()
+    assert kitchen['one_missing'].pk in other.search(pantry)
+    generation = other.get_generation()
+    with django_capture_on_commit_callbacks(execute=True):
+        IngredientsInRecipe.objects.create(
+            recipe=kitchen['two_missing'], ingredient=ingredients[1],
+            amount=1,
+        )
+    cache.delete(CHANGES_KEY.format(generation + 1))
+    assert kitchen['two_missing'].pk in other.search(
+        pantry, max_missing=2
+    )
+
+
+def test_update_matches_full_build():
+    generator = random.Random(24)
+    rows = {
+        (recipe_id, ingredient_id)
+        for recipe_id in range(1, 300)
+        for ingredient_id in generator.sample(range(50), 5)
+    }
+    index = PantryIndex().build(1, sorted(rows))
+    changed = set(generator.sample(range(1, 320), 40))
+    rows = {row for row in rows if row[0] not in changed} | {
+        (recipe_id, ingredient_id)
+        for recipe_id in changed if recipe_id % 3
+        for ingredient_id in generator.sample(range(55), 4)
+    }
+    updated = PantryIndex().update(index, 2, changed, sorted(
+        row for row in rows if row[0] in changed
+    ))
+    expected = PantryIndex().build(2, sorted(rows))
+    assert updated.postings == expected.postings
+    assert updated.sizes[:len(expected.sizes)] == expected.sizes
+    assert not any(updated.sizes[len(expected.sizes):])
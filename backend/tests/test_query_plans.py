@@ -0,0 +1,63 @@
+import pytest
+from django.db import connection
+
+from api.filters import RecipesFilter
+from recipes.models import Recipe
+from tests.conftest import IMAGE_NAME
+
+RECIPES = 2000
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != 'postgresql',
+    reason='Планы запросов проверяются только на PostgreSQL',
+)
+
+
+@pytest.fixture
+def feed(author, make_user, tags):
+    other = make_user('other')
+    Recipe.objects.bulk_create(
+        Recipe(
+            name=f'Рецепт {number}', text='Описание', image=IMAGE_NAME,
+            author=(author, other)[number % 2], cooking_time=10,
+        )
+        for number in range(RECIPES)
+    )
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe_id=recipe_id, tag=tags[number % len(tags)])
+        for number, recipe_id in enumerate(
+            Recipe.objects.values_list('id', flat=True)
+        )
+    )
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+        cursor.execute('SET LOCAL enable_seqscan = off')
+
+
+@pytest.mark.django_db
+def test_tag_filter_uses_exists_and_index(feed, tags):
+    queryset = RecipesFilter(
+        data={'tags': [tags[0].slug, tags[1].slug]},
+        queryset=Recipe.objects.all(),
+    ).qs[:10]
+    plan = queryset.explain()
+    assert 'Semi Join' in plan or 'SubPlan' in plan
+    assert 'recipe_tags_tag_recipe_idx' in plan
+    assert 'HashAggregate' not in plan
+    assert 'Unique' not in plan
+
+
+@pytest.mark.django_db
+def test_feed_ordering_uses_pub_date_index(feed):
+    plan = Recipe.objects.order_by('-pub_date')[:10].explain()
+    assert 'recipe_pub_date_idx' in plan
+    assert 'Sort' not in plan
+
+
+@pytest.mark.django_db
+def test_author_feed_uses_author_pub_date_index(feed, author):
+    plan = Recipe.objects.filter(
+        author=author
+    ).order_by('-pub_date')[:10].explain()
+    assert 'recipe_author_pub_date_idx' in plan
+    assert 'Sort' not in plan
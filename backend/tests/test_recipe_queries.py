@@ -0,0 +1,122 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Favorite, ShoppingCart, Tag
+from users.models import Subscriptions
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context.captured_queries), response.json()
+
+
+@pytest.fixture
+def many_recipes(make_user, make_recipe, user, tags, ingredients):
+    authors = [make_user(f'author{number}') for number in range(5)]
+    recipes = [
+        make_recipe(
+            f'Рецепт {number}',
+            author=authors[number % len(authors)],
+            tags=tags[:1 + number % len(tags)],
+            amounts={
+                ingredient: number + 1
+                for ingredient in ingredients[number % 10:number % 10 + 5]
+            },
+        )
+        for number in range(60)
+    ]
+    for recipe in recipes[::3]:
+        Favorite.objects.create(user=user, recipe=recipe)
+    for recipe in recipes[::4]:
+        ShoppingCart.objects.create(user=user, recipe=recipe)
+    for author in authors[:3]:
+        Subscriptions.objects.create(user=user, author=author)
+    return recipes
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('client_name', ('anon_client', 'user_client'))
+def test_recipe_list_queries_do_not_grow_with_page_size(
+        request, many_recipes, client_name):
+    client = request.getfixturevalue(client_name)
+    small, small_page = count_queries(client, '/api/recipes/?limit=5')
+    large, large_page = count_queries(client, '/api/recipes/?limit=50')
+    assert len(small_page['results']) == 5
+    assert len(large_page['results']) == 50
+    assert small == large
+    assert large <= 8
+
+
+@pytest.mark.django_db
+def test_recipe_list_flags_come_from_annotations(user_client, many_recipes,
+                                                 user):
+    _, page = count_queries(user_client, '/api/recipes/?limit=60')
+    favorited = set(Favorite.objects.filter(
+        user=user
+    ).values_list('recipe_id', flat=True))
+    in_cart = set(ShoppingCart.objects.filter(
+        user=user
+    ).values_list('recipe_id', flat=True))
+    subscribed = set(Subscriptions.objects.filter(
+        user=user
+    ).values_list('author_id', flat=True))
+    for recipe in page['results']:
+        assert recipe['is_favorited'] == (recipe['id'] in favorited)
+        assert recipe['is_in_shopping_cart'] == (recipe['id'] in in_cart)
+        assert recipe['author']['is_subscribed'] == (
+            recipe['author']['id'] in subscribed
+        )
+
+
+@pytest.mark.django_db
+def test_recipe_detail_queries_are_constant(user_client, make_recipe,
+                                            ingredients):
+    few = make_recipe('Мало', amounts={ingredients[0]: 1})
+    many = make_recipe(
+        'Много', amounts={ingredient: 2 for ingredient in ingredients}
+    )
+    few_queries, _ = count_queries(user_client, f'/api/recipes/{few.pk}/')
+    many_queries, data = count_queries(
+        user_client, f'/api/recipes/{many.pk}/'
+    )
+    assert len(data['ingredients']) == len(ingredients)
+    assert few_queries == many_queries
+
+
+@pytest.mark.django_db
+def test_tag_filter_sees_new_tags_without_signals(anon_client,
+                                                  make_recipe, tags):
+    make_recipe('Первый', tags=tags[:1])
+    assert anon_client.get('/api/recipes/', {'tags': 'new'}).status_code == 400
+    Tag.objects.bulk_create([Tag(name='Новый', color='#000', slug='new')])
+    recipe = make_recipe('Второй', tags=Tag.objects.filter(slug='new'))
+    response = anon_client.get(
+        '/api/recipes/', {'tags': ['new', tags[1].slug]}
+    )
+    assert response.status_code == 200
+    assert [item['id'] for item in response.json()['results']] == [recipe.pk]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params', ('', '&recipes_limit=2'))
+def test_subscriptions_load_only_listed_recipe_columns(user_client,
+                                                       many_recipes, params):
+    with CaptureQueriesContext(connection) as context:
+        response = user_client.get(f'/api/users/subscriptions/?{params}')
+    assert response.status_code == 200
+    recipes = [
+        recipe for author in response.json()['results']
+        for recipe in author['recipes']
+    ]
+    assert recipes
+    assert all(recipe['image'] for recipe in recipes)
+    recipe_queries = [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith('SELECT "recipes_recipe"')
+    ]
+    assert len(recipe_queries) == 1
+    for column in ('search_vector', 'text', 'favorites_count'):
+        assert f'"recipes_recipe"."{column}"' not in recipe_queries[0]
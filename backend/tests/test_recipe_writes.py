@@ -0,0 +1,120 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api import serializers
+from recipes import admin
+from recipes.models import Recipe
+from tests.conftest import image_data_uri
+
+
+def recipe_updates(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith('UPDATE "recipes_recipe" SET')
+        and '"name"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db
+def test_patch_does_not_write_counters(author_client, make_recipe):
+    recipe = make_recipe()
+    with CaptureQueriesContext(connection) as context:
+        response = author_client.patch(
+            f'/api/recipes/{recipe.pk}/', {'name': 'Новое название'},
+            format='json',
+        )
+    assert response.status_code == 200
+    updates = recipe_updates(context)
+    assert len(updates) == 1
+    assert 'favorites_count' not in updates[0]
+    assert 'in_carts_count' not in updates[0]
+
+
+@pytest.mark.django_db
+def test_admin_change_does_not_write_counters(client, make_user, make_recipe,
+                                              tags):
+    client.force_login(make_user('admin', is_staff=True, is_superuser=True))
+    recipe = make_recipe()
+    with CaptureQueriesContext(connection) as context:
+        response = client.post(
+            f'/admin/recipes/recipe/{recipe.pk}/change/',
+            {
+                'name': 'Из админки', 'author': recipe.author_id,
+                'text': recipe.text, 'tags': [tags[0].pk],
+                'cooking_time': 15, 'servings': recipe.servings,
+            },
+        )
+    assert response.status_code == 302
+    updates = recipe_updates(context)
+    assert len(updates) == 1
+    assert 'favorites_count' not in updates[0]
+    recipe.refresh_from_db()
+    assert (recipe.name, recipe.cooking_time) == ('Из админки', 15)
+
+
+@pytest.fixture
+def vector_updates(monkeypatch):
+    updates = []
+
+    def update_search_vectors(queryset):
+        updates.append(list(queryset.values_list('pk', flat=True)))
+
+    monkeypatch.setattr(
+        serializers, 'update_search_vectors', update_search_vectors
+    )
+    monkeypatch.setattr(admin, 'update_search_vectors', update_search_vectors)
+    return updates
+
+
+@pytest.mark.django_db
+def test_api_writes_refresh_search_vector_once(
+    author_client, tags, ingredients, vector_updates,
+    django_capture_on_commit_callbacks,
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        response = author_client.post('/api/recipes/', {
+            'name': 'Рецепт', 'text': 'Описание', 'cooking_time': 10,
+            'image': image_data_uri(), 'tags': [tags[0].pk],
+            'ingredients': [{'id': ingredients[0].pk, 'amount': 10}],
+        }, format='json')
+    assert response.status_code == 201
+    pk = response.json()['id']
+    assert vector_updates == [[pk]]
+    for data, expected in (
+        ({'name': 'Новое название'}, [[pk]]),
+        ({'cooking_time': 20}, []),
+    ):
+        vector_updates.clear()
+        response = author_client.patch(
+            f'/api/recipes/{pk}/', data, format='json'
+        )
+        assert response.status_code == 200
+        assert vector_updates == expected
+
+
+@pytest.mark.django_db
+def test_admin_change_refreshes_search_vector_once(
+    client, make_user, make_recipe, tags, vector_updates,
+):
+    client.force_login(make_user('admin', is_staff=True, is_superuser=True))
+    recipe = make_recipe()
+    response = client.post(
+        f'/admin/recipes/recipe/{recipe.pk}/change/',
+        {
+            'name': 'Из админки', 'author': recipe.author_id,
+            'text': recipe.text, 'tags': [tags[0].pk],
+            'cooking_time': 15, 'servings': recipe.servings,
+        },
+    )
+    assert response.status_code == 302
+    assert vector_updates == [[recipe.pk]]
+
+
+@pytest.mark.django_db
+def test_plain_save_writes_every_field(make_recipe):
+    recipe = make_recipe()
+    Recipe.objects.filter(pk=recipe.pk).update(favorites_count=3)
+    recipe.save()
+    recipe.refresh_from_db()
+    assert recipe.favorites_count == 0
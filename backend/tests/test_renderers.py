@@ -0,0 +1,57 @@
+import datetime
+import io
+import json
+import uuid
+from decimal import Decimal
+
+import pytest
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+
+DATA = {
+    'id': 1,
+    'name': 'Борщ "по-домашнему"',
+    'amount': Decimal('1.50'),
+    'pub_date': datetime.datetime(2024, 5, 1, 12, 30, 15, 123456,
+                                  tzinfo=datetime.timezone.utc),
+    'day': datetime.date(2024, 5, 1),
+    'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'tags': [{'slug': 'обед', 'color': '#E26C2D'}],
+    'image': None,
+    'flags': (True, False),
+}
+
+
+def test_renderer_matches_drf():
+    assert json.loads(FastJSONRenderer().render(DATA)) == json.loads(
+        JSONRenderer().render(DATA)
+    )
+
+
+def test_renderer_indent_and_empty_body():
+    renderer = FastJSONRenderer()
+    assert renderer.render(None) == b''
+    assert renderer.render(
+        DATA, 'application/json; indent=2'
+    ) == JSONRenderer().render(DATA, 'application/json; indent=2')
+
+
+@pytest.mark.parametrize('encoding', ('utf-8', 'cp1251'))
+def test_parser_matches_drf(encoding):
+    body = json.dumps(
+        {'name': 'Щи', 'ingredients': [{'id': 1, 'amount': 2.5}]},
+        ensure_ascii=False,
+    ).encode(encoding)
+    context = {'encoding': encoding}
+    assert FastJSONParser().parse(
+        io.BytesIO(body), parser_context=context
+    ) == JSONParser().parse(io.BytesIO(body), parser_context=context)
+
+
+def test_parser_rejects_invalid_json():
+    with pytest.raises(ParseError):
+        FastJSONParser().parse(io.BytesIO(b'{"name": '))
@@ -0,0 +1,119 @@
+import pytest
+
+
+@pytest.mark.django_db
+def test_tags_are_cached(anon_client, tags):
+    assert anon_client.get('/api/tags/')['X-Cache'] == 'MISS'
+    assert anon_client.get('/api/tags/')['X-Cache'] == 'HIT'
+
+
+@pytest.mark.django_db
+def test_cache_key_includes_host_and_scheme(anon_client, make_recipe):
+    recipe = make_recipe()
+    url = f'/api/recipes/{recipe.pk}/'
+    images = set()
+    for host, secure in (('testserver', False), ('localhost', False),
+                         ('localhost', True), ('testserver', False)):
+        response = anon_client.get(url, HTTP_HOST=host, secure=secure)
+        assert response.status_code == 200
+        images.add((response['X-Cache'], response.json()['image']))
+    assert images == {
+        ('MISS', f'http://testserver/media/{recipe.image}'),
+        ('MISS', f'http://localhost/media/{recipe.image}'),
+        ('MISS', f'https://localhost/media/{recipe.image}'),
+        ('HIT', f'http://testserver/media/{recipe.image}'),
+    }
+
+
+@pytest.mark.django_db
+def test_cache_disabled(settings, anon_client, make_recipe):
+    settings.API_CACHE_ENABLED = False
+    recipe = make_recipe()
+    for url in ('/api/tags/', '/api/recipes/', f'/api/recipes/{recipe.pk}/'):
+        response = anon_client.get(url)
+        assert response.status_code == 200
+        assert 'X-Cache' not in response
+        assert 'ETag' not in response
+
+
+def etag_of(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response['ETag']
+
+
+@pytest.mark.django_db
+def test_if_none_match_returns_not_modified(
+    anon_client, make_recipe, django_assert_num_queries
+):
+    recipe = make_recipe()
+    for url in ('/api/recipes/', f'/api/recipes/{recipe.pk}/'):
+        etag = etag_of(anon_client, url)
+        with django_assert_num_queries(0):
+            response = anon_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+
+
+@pytest.mark.django_db
+def test_etag_changes_with_recipes(
+    anon_client, author_client, make_recipe,
+    django_capture_on_commit_callbacks
+):
+    recipe = make_recipe()
+    etag = etag_of(anon_client, '/api/recipes/')
+    with django_capture_on_commit_callbacks(execute=True):
+        make_recipe(name='Новый рецепт')
+    response = anon_client.get('/api/recipes/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.json()['count'] == 2
+    url = f'/api/recipes/{recipe.pk}/'
+    etag = etag_of(anon_client, url)
+    with django_capture_on_commit_callbacks(execute=True):
+        assert author_client.delete(url).status_code == 204
+    assert anon_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 404
+
+
+@pytest.mark.django_db
+def test_etag_changes_with_user_state(
+    user_client, make_recipe, django_capture_on_commit_callbacks
+):
+    recipe = make_recipe()
+    urls = ('/api/recipes/', f'/api/recipes/{recipe.pk}/')
+    etags = [etag_of(user_client, url) for url in urls]
+    with django_capture_on_commit_callbacks(execute=True):
+        response = user_client.post(f'/api/recipes/{recipe.pk}/favorite/')
+    assert response.status_code == 201
+    for url, etag in zip(urls, etags):
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        data = response.json()
+        assert (data['results'][0] if 'results' in data else data)[
+            'is_favorited'
+        ]
+
+
+@pytest.mark.django_db
+def test_etag_is_per_user(anon_client, user_client, author_client,
+                          make_recipe):
+    make_recipe()
+    etag = etag_of(user_client, '/api/recipes/')
+    assert etag_of(author_client, '/api/recipes/') != etag
+    response = anon_client.get('/api/recipes/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_if_modified_since_is_ignored(
+    anon_client, make_recipe, django_capture_on_commit_callbacks
+):
+    recipe = make_recipe()
+    for url in ('/api/recipes/', f'/api/recipes/{recipe.pk}/'):
+        response = anon_client.get(url)
+        assert 'Last-Modified' not in response
+        with django_capture_on_commit_callbacks(execute=True):
+            make_recipe(name=f'Рецепт для {url}')
+        response = anon_client.get(
+            url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT'
+        )
+        assert response.status_code == 200
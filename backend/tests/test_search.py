@@ -0,0 +1,98 @@
+import pytest
+
+from recipes.models import Recipe
+from recipes.search import recipe_search_index, search_recipes
+from tests.conftest import IMAGE_NAME
+from users.models import Subscriptions
+
+MATCHES = 250
+
+
+@pytest.fixture
+def soups(author, tags):
+    Recipe.objects.bulk_create(
+        Recipe(
+            name=f'Борщ {number}', text='Суп', image=IMAGE_NAME,
+            author=author, cooking_time=10,
+        )
+        for number in range(MATCHES)
+    )
+    Recipe.objects.bulk_create((
+        Recipe(name='Салат', text='Без борща', image=IMAGE_NAME,
+               author=author, cooking_time=5),
+        Recipe(name='Каша', text='Овсяная', image=IMAGE_NAME,
+               author=author, cooking_time=5),
+    ))
+    tagged = Recipe.objects.order_by('pk')[:10]
+    for recipe in tagged:
+        recipe.tags.set(tags[:1])
+    return tagged
+
+
+def get_ids(response):
+    assert response.status_code == 200
+    return [recipe['id'] for recipe in response.json()['results']]
+
+
+def test_index_ranking(soups):
+    ranking = recipe_search_index.search('борщ')
+    assert len(ranking) == MATCHES + 1
+    assert Recipe.objects.get(pk=ranking[-1]).name == 'Салат'
+    assert recipe_search_index.search('борщи') == ranking
+    assert recipe_search_index.search('борш')
+    assert recipe_search_index.search('пельмени') == []
+
+
+def test_search_recipes_marks_ranking(soups):
+    queryset = search_recipes(Recipe.objects.all(), 'борщ')
+    assert queryset.ranking == recipe_search_index.search('борщ')
+    assert queryset.filter(tags__isnull=False).ranking == queryset.ranking
+    assert queryset.count() == MATCHES + 1
+
+
+@pytest.mark.django_db
+def test_search_is_not_capped(anon_client, soups):
+    seen = []
+    response = anon_client.get(
+        '/api/recipes/', {'search': 'борщ', 'limit': 100}
+    )
+    while True:
+        assert response.json()['count'] == MATCHES + 1
+        seen += get_ids(response)
+        if response.json()['next'] is None:
+            break
+        response = anon_client.get(response.json()['next'])
+    assert seen == recipe_search_index.search('борщ')
+
+
+@pytest.mark.django_db
+def test_search_with_filters(anon_client, soups, tags):
+    response = anon_client.get(
+        '/api/recipes/', {'search': 'борщ', 'tags': tags[0].slug,
+                          'limit': 20}
+    )
+    assert response.json()['count'] == len(soups)
+    assert get_ids(response) == [
+        pk for pk in recipe_search_index.search('борщ')
+        if pk in {recipe.pk for recipe in soups}
+    ]
+
+
+@pytest.mark.django_db
+def test_search_with_cursor_keeps_rank(anon_client, soups):
+    ranking = recipe_search_index.search('борщ')
+    response = anon_client.get(
+        '/api/recipes/', {'search': 'борщ', 'cursor': 'abc', 'limit': 5}
+    )
+    assert get_ids(response) == ranking[:5]
+    assert response.json()['count'] == MATCHES + 1
+    assert 'page=2' in response.json()['next']
+
+
+@pytest.mark.django_db
+def test_feed_rejects_search(user, user_client, author, soups):
+    Subscriptions.objects.create(user=user, author=author)
+    assert user_client.get('/api/recipes/feed/').status_code == 200
+    response = user_client.get('/api/recipes/feed/', {'search': 'борщ'})
+    assert response.status_code == 400
+    assert 'search' in response.json()
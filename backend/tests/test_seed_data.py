@@ -0,0 +1,50 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db.models import F
+
+from recipes.models import (Favorite, Ingredient, Recipe, ShoppingCart,
+                            ShoppingCartItem)
+from users.models import MyUser, Subscriptions
+
+
+def seed(**options):
+    call_command('seed_data', stdout=StringIO(), **options)
+
+
+@pytest.mark.django_db
+def test_seed_data_creates_requested_scale(ingredients):
+    seed(users=5, recipes_per_user=3, ingredients_per_recipe=4, tags=2,
+         favorites_per_user=2, carts_per_user=1, subscriptions_per_user=2)
+    assert MyUser.objects.count() == 5
+    assert Recipe.objects.count() == 15
+    assert Favorite.objects.count() == 10
+    assert ShoppingCart.objects.count() == 5
+    assert Subscriptions.objects.count() == 10
+    assert not Subscriptions.objects.filter(
+        user_id=F('author_id')
+    ).exists()
+    for recipe in Recipe.objects.all():
+        assert recipe.ingredients_list.count() == 4
+        assert 1 <= recipe.tags.count() <= 2
+    assert ShoppingCartItem.objects.exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('options, message', (
+    ({'tags': 0}, '--tags'),
+    ({'users': 0}, '--users'),
+    ({'favorites_per_user': -1}, '--favorites-per-user'),
+    ({'ingredients_per_recipe': 31}, '--ingredients-per-recipe'),
+))
+def test_seed_data_rejects_invalid_options(ingredients, options, message):
+    with pytest.raises(CommandError, match=message):
+        seed(**options)
+    assert not Recipe.objects.exists()
+
+
+@pytest.mark.django_db
+def test_seed_data_loads_catalogue_when_empty():
+    seed(users=1, recipes_per_user=1, tags=1)
+    assert Ingredient.objects.count() > 1000
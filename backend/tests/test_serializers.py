@@ -0,0 +1,59 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.serializers import RecipeListSerializer, RecipeReadSerializer
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscriptions
+
+
+def make_request(user):
+    request = Request(APIRequestFactory().get('/api/recipes/'))
+    request.user = user
+    return request
+
+
+def render(serializer_class, queryset, request):
+    return JSONRenderer().render(serializer_class(
+        queryset, many=True, context={'request': request}
+    ).data)
+
+
+@pytest.fixture
+def recipes(make_recipe, make_user, user, tags, ingredients):
+    other = make_user('other')
+    recipes = [
+        make_recipe(
+            name=f'Рецепт {number}',
+            author=(None, other)[number % 2],
+            tags=tags[:number % 4],
+            amounts={
+                ingredient: number + position
+                for position, ingredient in enumerate(
+                    ingredients[number:number + number % 5]
+                )
+            },
+            servings=number + 1,
+            image_medium=('', 'images/renditions/test.webp')[number % 2],
+        )
+        for number in range(6)
+    ]
+    Favorite.objects.create(user=user, recipe=recipes[0])
+    ShoppingCart.objects.create(user=user, recipe=recipes[1])
+    Subscriptions.objects.create(user=user, author=other)
+    return recipes
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('authenticated', (False, True),
+                         ids=('anonymous', 'user'))
+def test_list_serializer_matches_read_serializer(recipes, user,
+                                                 authenticated):
+    user = user if authenticated else AnonymousUser()
+    request = make_request(user)
+    queryset = Recipe.objects.for_read(user)
+    assert render(RecipeListSerializer, queryset, request) == render(
+        RecipeReadSerializer, queryset, request
+    )
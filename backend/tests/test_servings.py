@@ -0,0 +1,137 @@
+import json
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+
+from recipes.models import (Ingredient, ShoppingCart, ShoppingCartItem,
+                            UnitConversion)
+
+
+def cart_amounts(user):
+    return dict(ShoppingCartItem.objects.filter(user=user).values_list(
+        'ingredient__name', 'total_amount'
+    ))
+
+
+def shopping_list(client):
+    response = client.get(
+        '/api/recipes/download_shopping_cart/', {'format': 'json'}
+    )
+    assert response.status_code == 200
+    return [
+        (item['name'], item['amount'], item['measurement_unit'])
+        for item in json.loads(b''.join(response.streaming_content))
+    ]
+
+
+def set_servings(client, recipe, servings):
+    response = client.patch(
+        f'/api/recipes/{recipe.pk}/shopping_cart/', {'servings': servings},
+        format='json',
+    )
+    assert response.status_code == 200
+
+
+@pytest.fixture
+def recipe(make_recipe, ingredients):
+    return make_recipe(
+        amounts={ingredients[0]: 10, ingredients[1]: 3}, servings=4
+    )
+
+
+@pytest.mark.django_db
+def test_cart_servings_scale_amounts(user, user_client, recipe):
+    assert user_client.post(
+        f'/api/recipes/{recipe.pk}/shopping_cart/'
+    ).status_code == 201
+    assert cart_amounts(user) == {'ингредиент 0': 10, 'ингредиент 1': 3}
+    set_servings(user_client, recipe, 2)
+    assert cart_amounts(user) == {
+        'ингредиент 0': 5, 'ингредиент 1': Decimal('1.5')
+    }
+    set_servings(user_client, recipe, 3)
+    assert cart_amounts(user) == {
+        'ингредиент 0': Decimal('7.5'), 'ингредиент 1': Decimal('2.25')
+    }
+    assert shopping_list(user_client) == [
+        ('ингредиент 0', 7.5, 'г'), ('ингредиент 1', 2.25, 'г'),
+    ]
+    assert user_client.delete(
+        f'/api/recipes/{recipe.pk}/shopping_cart/'
+    ).status_code == 204
+    assert cart_amounts(user) == {}
+
+
+@pytest.mark.django_db
+def test_repeated_changes_do_not_drift(user, user_client, make_recipe,
+                                       ingredients):
+    recipe = make_recipe(amounts={ingredients[0]: 10}, servings=3)
+    other = make_recipe(amounts={ingredients[0]: 1}, servings=3)
+    ShoppingCart.objects.create(user=user, recipe=other, servings=1)
+    user_client.post(f'/api/recipes/{recipe.pk}/shopping_cart/')
+    for servings in [1, 2, 5, 7] * 10:
+        set_servings(user_client, recipe, servings)
+    set_servings(user_client, recipe, 1)
+    assert cart_amounts(user) == {'ингредиент 0': Decimal('3.666')}
+    call_command('rebuild_shopping_cart_items', '--verify')
+    user_client.delete(f'/api/recipes/{recipe.pk}/shopping_cart/')
+    assert cart_amounts(user) == {'ингредиент 0': Decimal('0.333')}
+
+
+@pytest.mark.django_db
+def test_recipe_changes_keep_cart_servings(user, make_user, make_client,
+                                           author_client, recipe,
+                                           ingredients):
+    other = make_user('other')
+    ShoppingCart.objects.create(user=user, recipe=recipe, servings=2)
+    ShoppingCart.objects.create(user=other, recipe=recipe)
+    ShoppingCartItem.objects.rebuild()
+    response = author_client.patch(
+        f'/api/recipes/{recipe.pk}/',
+        {
+            'servings': 8,
+            'ingredients': [{'id': ingredients[0].pk, 'amount': 12},
+                            {'id': ingredients[2].pk, 'amount': 1}],
+        },
+        format='json',
+    )
+    assert response.status_code == 200
+    assert cart_amounts(user) == {
+        'ингредиент 0': 3, 'ингредиент 2': Decimal('0.25')
+    }
+    assert cart_amounts(other) == {'ингредиент 0': 12, 'ингредиент 2': 1}
+    call_command('rebuild_shopping_cart_items', '--verify')
+
+
+@pytest.mark.django_db
+def test_shopping_list_converts_units(user, user_client, make_recipe):
+    for unit, base_unit, factor in (('кг', 'г', 1000), ('стакан', 'мл', 200)):
+        UnitConversion.objects.update_or_create(
+            unit=unit, defaults={'base_unit': base_unit, 'factor': factor}
+        )
+    flour = [
+        Ingredient.objects.create(name='мука', measurement_unit=unit)
+        for unit in ('кг', 'г', 'щепотка')
+    ]
+    salt = Ingredient.objects.create(name='соль', measurement_unit='щепотка')
+    milk = Ingredient.objects.create(name='молоко', measurement_unit='стакан')
+    recipe = make_recipe(amounts={
+        flour[0]: 1, flour[1]: 250, flour[2]: 3, salt: 2, milk: 1,
+    }, servings=2)
+    ShoppingCart.objects.create(user=user, recipe=recipe, servings=3)
+    ShoppingCartItem.objects.rebuild()
+    assert shopping_list(user_client) == [
+        ('молоко', 300, 'мл'),
+        ('мука', 1875, 'г'),
+        ('мука', 4.5, 'щепотка'),
+        ('соль', 3, 'щепотка'),
+    ]
+    UnitConversion.objects.create(
+        unit='щепотка', base_unit='г', factor=Decimal('0.5')
+    )
+    assert shopping_list(user_client) == [
+        ('молоко', 300, 'мл'),
+        ('мука', 1877.25, 'г'),
+        ('соль', 1.5, 'г'),
+    ]
@@ -0,0 +1,134 @@
+import random
+from collections import defaultdict
+from math import sqrt
+
+import pytest
+
+from recipes import similarity
+from recipes.models import Favorite, RecipeSimilarity
+
+RECIPES = 60
+TOP_K = 5
+
+
+@pytest.fixture
+def features():
+    generator = random.Random(23)
+    recipe_ids = list(range(1, RECIPES + 1))
+    ingredients = {
+        (recipe_id, ingredient_id)
+        for recipe_id in recipe_ids[:-1]
+        for ingredient_id in generator.sample(range(40), 6)
+    }
+    favorites = {
+        (generator.choice(recipe_ids[:-1]), user_id)
+        for user_id in range(30)
+        for _ in range(4)
+    }
+    return recipe_ids, [
+        (sorted(ingredients), similarity.INGREDIENT_WEIGHT, True),
+        (sorted(favorites), similarity.FAVORITE_WEIGHT, False),
+    ]
+
+
+def brute_force(recipe_ids, features):
+    dense = defaultdict(dict)
+    for block, rows in enumerate(
+            similarity.build_vectors(recipe_ids, features)):
+        for position, row in rows.items():
+            for column, value in row.items():
+                dense[recipe_ids[position]][block, column] = value
+    scores = {}
+    for recipe_id, vector in dense.items():
+        for other, other_vector in dense.items():
+            if other != recipe_id:
+                score = sum(
+                    value * other_vector.get(column, 0)
+                    for column, value in vector.items()
+                )
+                if score:
+                    scores[recipe_id, other] = score
+    return scores
+
+
+def check_top_k(result, recipe_ids, features):
+    reference = brute_force(recipe_ids, features)
+    by_recipe = defaultdict(list)
+    for recipe_id, other, score in result:
+        assert score == pytest.approx(reference[recipe_id, other])
+        by_recipe[recipe_id].append(score)
+    for recipe_id in recipe_ids:
+        expected = sorted((
+            score for (first, _), score in reference.items()
+            if first == recipe_id
+        ), reverse=True)[:TOP_K]
+        assert by_recipe[recipe_id] == pytest.approx(expected)
+    assert all(RECIPES not in (recipe_id, other)
+               for recipe_id, other, _ in result)
+
+
+def test_vectors_are_normalized(features):
+    recipe_ids, features = features
+    for block, rows in enumerate(
+            similarity.build_vectors(recipe_ids, features)):
+        weight = features[block][1]
+        for row in rows.values():
+            assert sqrt(sum(value * value for value in row.values())) == (
+                pytest.approx(sqrt(weight))
+            )
+
+
+def test_top_k_python(features):
+    recipe_ids, features = features
+    check_top_k(
+        list(similarity.top_k_python(recipe_ids, features, TOP_K)),
+        recipe_ids, features,
+    )
+
+
+@pytest.mark.skipif(similarity.np is None, reason='NumPy не установлен')
+@pytest.mark.parametrize('batch_size', (7, similarity.BATCH_SIZE))
+def test_top_k_numpy(features, batch_size):
+    recipe_ids, features = features
+    result = list(similarity.top_k_numpy(
+        recipe_ids, features, TOP_K, batch_size
+    ))
+    check_top_k(result, recipe_ids, features)
+    python = list(similarity.top_k_python(recipe_ids, features, TOP_K))
+    assert [score for _, _, score in result] == pytest.approx(
+        [score for _, _, score in python]
+    )
+
+
+@pytest.fixture
+def similar_recipes(make_recipe, ingredients, make_user, user):
+    soups = [
+        make_recipe(name=f'Суп {number}', amounts={
+            ingredient: 10 for ingredient in ingredients[:5 - number]
+        })
+        for number in range(3)
+    ]
+    salad = make_recipe(name='Салат', amounts={ingredients[20]: 10})
+    Favorite.objects.create(user=user, recipe=soups[0])
+    return soups, salad
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('numpy', (True, False), ids=('numpy', 'python'))
+def test_refresh_and_endpoints(monkeypatch, similar_recipes, user_client,
+                               numpy):
+    if numpy and similarity.np is None:
+        pytest.skip('NumPy не установлен')
+    if not numpy:
+        monkeypatch.setattr(similarity, 'np', None)
+    soups, salad = similar_recipes
+    assert similarity.refresh_similarities() == 6
+    assert not RecipeSimilarity.objects.filter(recipe=salad).exists()
+    response = user_client.get(f'/api/recipes/{soups[0].pk}/similar/')
+    assert [recipe['id'] for recipe in response.json()] == [
+        soups[1].pk, soups[2].pk
+    ]
+    response = user_client.get('/api/recipes/recommendations/')
+    assert [recipe['id'] for recipe in response.json()][:2] == [
+        soups[1].pk, soups[2].pk
+    ]